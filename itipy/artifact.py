@@ -0,0 +1,203 @@
+import copy
+import json
+import zipfile
+
+import torch
+
+from itipy.data.storage import atomic_write
+
+ARTIFACT_INFO = 'iti_artifact.json'
+
+
+def export_generator(generator, path, format='torchscript', depth_generator=3, patch_factor=0, norms=None, fuse=True,
+                     resolution=256, opset=17):
+    """
+    Export a generator to a self-contained compiled artifact (TorchScript or ONNX).
+
+    The artifact does not require the itipy model classes and is loaded by InstrumentToInstrument(model_path=...)
+    or load_artifact. The padding configuration and the normalization of the instruments are embedded as metadata.
+
+    Args:
+        generator (nn.Module): Float generator (e.g., GeneratorAB or the generator_AB.pt of the SaveCallback).
+        path (str): Path of the artifact.
+        format (str): 'torchscript' or 'onnx'.
+        depth_generator (int): Depth of the generator network (images are padded to multiples of
+            2 ** (depth_generator + patch_factor)).
+        patch_factor (int): Factor by which the image should be divided into patches.
+        norms (list): Normalizations of the input channels (ImageNormalize).
+        fuse (bool): Fold the normalization layers with running statistics into the convolutions.
+        resolution (int): Resolution of the example input for tracing.
+        opset (int): ONNX opset version.
+
+    Returns:
+        dict: Metadata of the artifact.
+    """
+    assert format in ['torchscript', 'onnx'], "Format must be one of: ['torchscript', 'onnx']"
+    generator = copy.deepcopy(generator).cpu().eval()  # the generator of the caller is not modified
+    fuse = fuse and hasattr(generator, 'fuse_for_inference')
+    if fuse:
+        generator = generator.fuse_for_inference()
+    n_channels = next(p for p in generator.parameters() if p.dim() == 4).shape[1]
+    example = torch.rand(1, n_channels, resolution, resolution) * 2 - 1
+    info = {'format': format, 'depth_generator': depth_generator, 'patch_factor': patch_factor,
+            'padding_divisor': 2 ** (depth_generator + patch_factor), 'input_channels': int(n_channels),
+            'norms': [_normToDict(norm) for norm in norms] if norms is not None else None,
+            'fused': fuse, 'torch_version': torch.__version__}
+    with atomic_write(path) as tmp_path:
+        if format == 'torchscript':
+            # check that the traced graph generalizes to other image sizes
+            check_input = torch.rand(2, n_channels, resolution * 2, resolution * 2) * 2 - 1
+            with torch.no_grad():
+                traced = torch.jit.trace(generator, example, check_inputs=[(check_input,)])
+            save_torchscript(traced, tmp_path, info)
+        else:
+            _exportOnnx(generator, example, tmp_path, info, opset)
+    return info
+
+
+def save_torchscript(module, path, info):
+    """
+    Save a TorchScript module with embedded metadata.
+
+    Args:
+        module (torch.jit.ScriptModule): TorchScript module.
+        path (str): Path of the artifact.
+        info (dict): Metadata of the artifact.
+    """
+    torch.jit.save(module, path, _extra_files={ARTIFACT_INFO: json.dumps(info)})
+
+
+def load_artifact(path, device=None):
+    """
+    Load a compiled artifact (TorchScript or ONNX) and its metadata. The itipy model classes are not imported.
+
+    Args:
+        path (str): Path of the artifact.
+        device (torch.device): Device on which the artifact should be loaded (quantized artifacts are loaded on the
+            CPU).
+
+    Returns:
+        tuple: generator, metadata (empty for artifacts without metadata).
+    """
+    device = torch.device('cpu') if device is None else device
+    if is_onnx(path):
+        generator = OnnxGenerator(path, device)
+        return generator, generator.info
+    extra_files = {ARTIFACT_INFO: ''}
+    module = torch.jit.load(path, map_location='cpu', _extra_files=extra_files)
+    info = json.loads(extra_files[ARTIFACT_INFO]) if extra_files[ARTIFACT_INFO] else {}
+    if 'quantized' in info:
+        torch.backends.quantized.engine = info['backend']
+    else:
+        module.to(device)
+    return module, info
+
+
+def is_artifact(path):
+    """
+    Check if a model file is a compiled artifact (TorchScript or ONNX) instead of a pickled module (torch.save).
+
+    Args:
+        path (str): Path of the model file.
+
+    Returns:
+        bool: True for compiled artifacts.
+    """
+    return is_onnx(path) or is_torchscript(path)
+
+
+def is_torchscript(path):
+    """
+    Check if a model file is a TorchScript archive (torch.jit.save).
+
+    Args:
+        path (str): Path of the model file.
+
+    Returns:
+        bool: True for TorchScript archives.
+    """
+    if not zipfile.is_zipfile(path):
+        return False
+    with zipfile.ZipFile(path) as f:
+        return any(name.endswith('constants.pkl') for name in f.namelist())
+
+
+def is_onnx(path):
+    return path.endswith('.onnx')
+
+
+class OnnxGenerator:
+    """
+    ONNX Runtime backend with the calling convention of the torch generators (torch.Tensor in and out).
+
+    Args:
+        path (str): Path of the ONNX artifact.
+        device (torch.device): Device for the inference (CUDA execution provider for CUDA devices).
+    """
+
+    def __init__(self, path, device):
+        import onnxruntime  # optional dependency
+        providers = ['CPUExecutionProvider']
+        if device.type == 'cuda':
+            providers = ['CUDAExecutionProvider'] + providers
+        self.session = onnxruntime.InferenceSession(path, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+        info = self.session.get_modelmeta().custom_metadata_map.get(ARTIFACT_INFO)
+        self.info = json.loads(info) if info else {}
+
+    def __call__(self, tensor):
+        output = self.session.run(None, {self.input_name: tensor.detach().cpu().float().numpy()})[0]
+        return torch.from_numpy(output)
+
+    def eval(self):
+        return self
+
+    def to(self, *args, **kwargs):
+        return self
+
+
+def _exportOnnx(generator, example, path, info, opset):
+    import onnx  # optional dependency
+    dynamic_axes = {'input': {0: 'batch', 2: 'height', 3: 'width'}, 'output': {0: 'batch', 2: 'height', 3: 'width'}}
+    with torch.no_grad():
+        torch.onnx.export(generator, example, path, input_names=['input'], output_names=['output'],
+                          dynamic_axes=dynamic_axes, opset_version=opset)
+    model = onnx.load(path)
+    entry = model.metadata_props.add()
+    entry.key = ARTIFACT_INFO
+    entry.value = json.dumps(info)
+    onnx.save(model, path)
+
+
+def _normToDict(norm):
+    stretch = norm.stretch
+    return {'vmin': float(norm.vmin), 'vmax': float(norm.vmax), 'clip': bool(norm.clip),
+            'stretch': type(stretch).__name__,
+            'stretch_params': {k: float(v) for k, v in vars(stretch).items()
+                               if not k.startswith('_') and isinstance(v, (int, float))}}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Export an ITI generator to a compiled artifact (TorchScript/ONNX).')
+    parser.add_argument('--model_path', type=str, required=True,
+                        help='Path to the pickled generator (generator_AB.pt) or the checkpoint (checkpoint.pt).')
+    parser.add_argument('--output_path', type=str, required=True, help='Path of the artifact.')
+    parser.add_argument('--format', type=str, default='torchscript', help='torchscript or onnx.')
+    parser.add_argument('--depth_generator', type=int, default=3, help='Depth of the generator network.')
+    parser.add_argument('--patch_factor', type=int, default=0, help='Patch factor of the translator.')
+    parser.add_argument('--norms', type=str, default=None,
+                        help='Normalization of the input instrument (e.g., sdo_norms, soho_norms, hinode_norms).')
+    parser.add_argument('--no_fuse', action='store_true', help='Do not fold the normalization layers.')
+    args = parser.parse_args()
+
+    model = torch.load(args.model_path, map_location='cpu')
+    model = model['gen_ab'] if isinstance(model, dict) else model
+    norms = None
+    if args.norms is not None:
+        from itipy.data import editor
+        norms = list(getattr(editor, args.norms).values())
+    info = export_generator(model, args.output_path, format=args.format, depth_generator=args.depth_generator,
+                            patch_factor=args.patch_factor, norms=norms, fuse=not args.no_fuse)
+    print('Exported %s: %s' % (args.output_path, json.dumps(info)))
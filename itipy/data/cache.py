@@ -0,0 +1,219 @@
+import functools
+import hashlib
+import logging
+import os
+import pickle
+import types
+
+import numpy as np
+import pandas as pd
+
+from itipy.data.storage import atomic_write
+
+
+class EditorCache:
+    """
+    Persistent on-disk cache for the outputs of editor pipelines (e.g., normalized arrays and headers).
+
+    Entries are keyed by the file path, the modification time and size of the file, and a fingerprint of the
+    editor list and its parameters. Changing a file or any editor parameter results in a new entry. The cache
+    size is bounded by ``max_size``; the least recently used entries are evicted first.
+
+    The cache directory is only listed on the first write of a process, when the estimated size (listed size and
+    entries written by this process) exceeds max_size, and every evict_interval writes (entries of other workers).
+    Eviction reduces the cache to 90% of max_size.
+
+    Args:
+        cache_dir (str): Directory for the cached entries.
+        max_size (int): Maximum size of the cache in bytes (None for unbounded).
+        evict_interval (int): Number of writes after which the size of the cache directory is listed again.
+    """
+
+    def __init__(self, cache_dir, max_size=50 * 1024 ** 3, evict_interval=1000):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.evict_interval = evict_interval
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = None  # estimated size of the cache in bytes (None before the first listing)
+        self._n_writes = 0
+
+    def convert(self, data, editors, convert_fn, fingerprint=None):
+        """
+        Load the pipeline result from the cache or compute and store it.
+
+        Args:
+            data: Input of the editor pipeline. Only file paths are cached.
+            editors (list): List of editors.
+            convert_fn (function): Function that applies the editors to the data.
+            fingerprint (str): Precomputed fingerprint of the editors.
+
+        Returns:
+            tuple: Converted data and kwargs.
+        """
+        if not isinstance(data, str) or not os.path.isfile(data):
+            return convert_fn(data)
+        if fingerprint is None:
+            try:
+                fingerprint = get_fingerprint(editors)
+            except UncacheableError as ex:
+                logging.warning('Editors are not cached: %s' % ex)
+                return convert_fn(data)
+        entry_path = os.path.join(self.cache_dir, '%s.pkl' % self.getKey(data, fingerprint))
+        if os.path.exists(entry_path):
+            try:
+                with open(entry_path, 'rb') as f:
+                    result = pickle.load(f)
+                os.utime(entry_path)  # mark as recently used
+                return result
+            except Exception as ex:
+                logging.error('Unable to load cache entry %s: %s' % (entry_path, ex))
+        result = convert_fn(data)
+        self._write(entry_path, result)
+        return result
+
+    def getKey(self, path, fingerprint):
+        stat = os.stat(path)
+        key = '%s|%d|%d|%s' % (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, fingerprint)
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def clear(self):
+        for entry in self._entries():
+            os.remove(entry.path)
+        self._size = 0
+
+    def _write(self, entry_path, result):
+        try:
+            with atomic_write(entry_path) as tmp_path:  # atomic for concurrent workers
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+                n_bytes = os.path.getsize(tmp_path)
+        except Exception as ex:
+            logging.error('Unable to write cache entry %s: %s' % (entry_path, ex))
+            return
+        self._evict(n_bytes)
+
+    def _entries(self):
+        return [e for e in os.scandir(self.cache_dir) if e.name.endswith('.pkl')]
+
+    def _evict(self, n_bytes):
+        if self.max_size is None:
+            return
+        self._n_writes += 1
+        if self._size is not None and self._n_writes % self.evict_interval != 0:
+            self._size += n_bytes
+            if self._size <= self.max_size:
+                return
+        # list the cache (first write, limit exceeded or entries of other workers)
+        entries = []
+        for e in self._entries():
+            try:
+                stat = e.stat()
+            except FileNotFoundError:  # removed by other worker
+                continue
+            entries.append((stat.st_mtime, stat.st_size, e.path))
+        total_size = sum(size for _, size, _ in entries)
+        if total_size > self.max_size:
+            for _, size, path in sorted(entries):
+                if total_size <= 0.9 * self.max_size:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total_size -= size
+        self._size = total_size
+
+
+def get_fingerprint(obj):
+    """
+    Stable fingerprint of editors and their parameters.
+
+    Functions are described by their code (bytecode, constants and names), default arguments, closure variables
+    and the referenced global values. Objects that cannot be described by their state raise an UncacheableError
+    (the results are not cached).
+
+    Args:
+        obj: Editor, list of editors or parameter.
+
+    Returns:
+        str: hex digest of the fingerprint.
+    """
+    return hashlib.sha256(_describe(obj, set()).encode()).hexdigest()
+
+
+class UncacheableError(Exception):
+    """Raised if editors contain objects without a stable description."""
+
+
+def _describe(obj, stack):
+    if obj is None or isinstance(obj, (bool, int, float, complex, str, bytes)):
+        return repr(obj)
+    if isinstance(obj, np.ndarray):
+        unit = str(getattr(obj, 'unit', ''))
+        return 'array(%s,%s,%s,%s)' % (obj.shape, obj.dtype, unit,
+                                       hashlib.sha256(np.ascontiguousarray(obj).tobytes()).hexdigest())
+    if isinstance(obj, np.generic):
+        return '%s(%r)' % (type(obj).__name__, obj.item())
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return 'pandas(%s)' % hashlib.sha256(pd.util.hash_pandas_object(obj).values.tobytes()).hexdigest()
+    if isinstance(obj, (type, types.BuiltinFunctionType, types.ModuleType, np.ufunc)):
+        return '%s.%s' % (getattr(obj, '__module__', ''), getattr(obj, '__qualname__', getattr(obj, '__name__', '')))
+    if id(obj) in stack:  # reference cycle (e.g., recursive closures)
+        return 'cycle(%s)' % type(obj).__qualname__
+    stack.add(id(obj))
+    try:
+        return _describeContainer(obj, stack)
+    finally:
+        stack.discard(id(obj))
+
+
+def _describeContainer(obj, stack):
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        items = sorted(obj, key=repr) if isinstance(obj, (set, frozenset)) else obj
+        return '%s[%s]' % (type(obj).__name__, ','.join(_describe(o, stack) for o in items))
+    if isinstance(obj, dict):
+        return '{%s}' % ','.join('%s:%s' % (_describe(k, stack), _describe(v, stack))
+                                 for k, v in sorted(obj.items(), key=lambda item: repr(item[0])))
+    if isinstance(obj, types.FunctionType):
+        return _describeFunction(obj, stack)
+    if isinstance(obj, types.MethodType):
+        return 'method(%s,%s)' % (_describe(obj.__func__, stack), _describe(obj.__self__, stack))
+    if isinstance(obj, functools.partial):
+        return 'partial(%s,%s,%s)' % (_describe(obj.func, stack), _describe(obj.args, stack),
+                                      _describe(obj.keywords, stack))
+    if hasattr(obj, '__dict__'):
+        return '%s.%s(%s)' % (type(obj).__module__, type(obj).__qualname__, _describe(vars(obj), stack))
+    description = repr(obj)
+    if ' at 0x' in description:  # the state of the object is unknown
+        raise UncacheableError('Unable to describe %s' % description)
+    return description
+
+
+def _describeFunction(fn, stack):
+    closure = [_describeCell(cell, stack) for cell in fn.__closure__ or ()]
+    # global values used by the function (e.g., constants); modules and classes are described by name
+    global_values = {name: fn.__globals__[name] for name in _codeNames(fn.__code__) if name in fn.__globals__}
+    return 'function(%s.%s,%s,%s,%s,%s,%s)' % (fn.__module__, fn.__qualname__, _describeCode(fn.__code__),
+                                               _describe(fn.__defaults__, stack), _describe(fn.__kwdefaults__, stack),
+                                               ','.join(closure), _describe(global_values, stack))
+
+
+def _describeCode(code):
+    consts = [_describeCode(c) if isinstance(c, types.CodeType) else repr(c) for c in code.co_consts]
+    description = '%s|%s|%s' % (code.co_code.hex(), ','.join(consts), ','.join(code.co_names))
+    return hashlib.sha256(description.encode()).hexdigest()
+
+
+def _codeNames(code):
+    names = set(code.co_names)
+    for c in code.co_consts:
+        if isinstance(c, types.CodeType):
+            names |= _codeNames(c)
+    return sorted(names)
+
+
+def _describeCell(cell, stack):
+    try:
+        return _describe(cell.cell_contents, stack)
+    except ValueError:  # empty cell
+        return 'empty'
@@ -0,0 +1,271 @@
+import argparse
+import logging
+import os
+import sqlite3
+from datetime import datetime
+from functools import partial
+
+import numpy as np
+from astropy.io import fits
+from dateutil.parser import parse
+from tqdm import tqdm
+
+from itipy.data.storage import parallel_map
+
+
+class ObservationCatalog:
+    """
+    Persistent catalog of observations extracted from the FITS headers (SQLite).
+
+    Each file is recorded with its size and modification time, such that updates only read the headers of new or
+    changed files. Headers are read without loading the data. Files with unreadable headers are recorded in a
+    separate table and only read again when they change. Queries select files by directory, extension, time
+    range, months, years, instrument, wavelength and quality.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+    """
+
+    COLUMNS = ['path', 'size', 'mtime', 'instrument', 'wavelength', 'date', 'year', 'month', 'shape_x', 'shape_y',
+               'exposure', 'quality']
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._connection = None
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS observations ('
+                                    'path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, instrument TEXT, '
+                                    'wavelength REAL, date TEXT, year INTEGER, month INTEGER, shape_x INTEGER, '
+                                    'shape_y INTEGER, exposure REAL, quality INTEGER)')
+            self.connection.execute('CREATE INDEX IF NOT EXISTS observations_date ON observations (date)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS failures ('
+                                    'path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, error TEXT)')
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM observations').fetchone()[0]
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_connection'] = None  # connections are reopened by each process
+        return state
+
+    @property
+    def connection(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.db_path)
+        return self._connection
+
+    def update(self, data, ext=None, date_parser=None, n_workers=4):
+        """
+        Add new and changed files to the catalog and remove deleted files.
+
+        Args:
+            data (Union[str, list]): Directory (searched recursively) or list of files.
+            ext (str): File extension.
+            date_parser: Date parser for files without observation date in the header (default: parse the basename).
+            n_workers (int): Number of worker processes for reading the headers.
+
+        Returns:
+            int: Number of updated entries.
+        """
+        if isinstance(data, str):
+            files = dict(_scan(os.path.abspath(data), ext))
+            known = self._select('SELECT path, size, mtime FROM observations', root=os.path.abspath(data), ext=ext)
+            failed = self._select('SELECT path, size, mtime FROM failures', root=os.path.abspath(data), ext=ext)
+        else:
+            files = {}
+            for f in data:
+                f = os.path.abspath(f)
+                stat = os.stat(f)
+                files[f] = (stat.st_size, stat.st_mtime_ns)
+            known = self._selectPaths('SELECT path, size, mtime FROM observations', list(files))
+            failed = self._selectPaths('SELECT path, size, mtime FROM failures', list(files))
+        known = {path: (size, mtime) for path, size, mtime in known}
+        failed = {path: (size, mtime) for path, size, mtime in failed}
+        changed = [f for f, stat in files.items() if known.get(f) != stat and failed.get(f) != stat]
+        deleted = [(f,) for f in list(known) + list(failed) if f not in files]
+
+        entries, failures = [], []
+        read_fn = partial(read_header_entry, date_parser=date_parser)
+        for path, entry, error in tqdm(parallel_map(read_fn, changed, n_workers), total=len(changed),
+                                       disable=len(changed) == 0):
+            if error is not None:
+                logging.error('Unable to read header of %s: %s' % (path, error))
+                failures.append((path, *files[path], error))
+                continue
+            entries.append((path, *files[path], *entry))
+        with self.connection:
+            self.connection.executemany('DELETE FROM observations WHERE path = ?',
+                                        deleted + [(f[0],) for f in failures])
+            self.connection.executemany('DELETE FROM failures WHERE path = ?', deleted + [(e[0],) for e in entries])
+            self.connection.executemany('INSERT OR REPLACE INTO observations VALUES (%s)' %
+                                        ', '.join('?' * len(self.COLUMNS)), entries)
+            self.connection.executemany('INSERT OR REPLACE INTO failures VALUES (?, ?, ?, ?)', failures)
+        return len(entries) + len(deleted)
+
+    def query(self, root=None, ext=None, start=None, end=None, months=None, years=None, instrument=None,
+              wavelength=None, quality=None, with_dates=False):
+        """
+        Select files from the catalog.
+
+        Args:
+            root (str): Directory of the files.
+            ext (str): File extension.
+            start (datetime): Start of the time range (inclusive).
+            end (datetime): End of the time range (exclusive).
+            months (list): List of months.
+            years (list): List of years.
+            instrument (Union[str, list]): Instrument(s) (INSTRUME keyword).
+            wavelength (Union[float, list]): Wavelength(s) (WAVELNTH keyword).
+            quality (Union[int, list]): Accepted value(s) of the QUALITY keyword (e.g., 0).
+            with_dates (bool): Additionally return the observation dates.
+
+        Returns:
+            list: Sorted list of file paths (and np.ndarray of the observation dates if with_dates).
+        """
+        conditions, values = [], []
+        if start is not None:
+            conditions.append('date >= ?')
+            values.append(_format_date(start))
+        if end is not None:
+            conditions.append('date < ?')
+            values.append(_format_date(end))
+        for column, selection in [('month', months), ('year', years), ('instrument', instrument),
+                                  ('wavelength', wavelength), ('quality', quality)]:
+            if selection is None:
+                continue
+            selection = list(selection) if isinstance(selection, (list, tuple, set)) else [selection]
+            conditions.append('%s IN (%s)' % (column, ', '.join('?' * len(selection))))
+            values += selection
+        rows = self._select('SELECT path, date FROM observations', conditions, values,
+                            root=None if root is None else os.path.abspath(root), ext=ext)
+        rows = sorted(rows)
+        paths = [row[0] for row in rows]
+        if with_dates:
+            return paths, np.array([row[1] for row in rows], dtype='datetime64[us]')
+        return paths
+
+    def getDates(self, paths):
+        """
+        Observation dates of the files. Missing files are added to the catalog.
+
+        Args:
+            paths (list): List of file paths.
+
+        Returns:
+            list: Observation dates (datetime).
+        """
+        paths = [os.path.abspath(p) for p in paths]
+        self.update(paths)
+        dates = dict(self._selectPaths('SELECT path, date FROM observations', paths))
+        missing = [p for p in paths if p not in dates]
+        assert len(missing) == 0, 'Unable to read the observation date of %d files (e.g., %s)' % \
+                                  (len(missing), missing[0] if missing else '')
+        return [datetime.fromisoformat(dates[p]) for p in paths]
+
+    def _selectPaths(self, statement, paths, chunk_size=500):
+        # select the rows of the given paths (chunked, SQLite limits the number of parameters)
+        rows = []
+        for i in range(0, len(paths), chunk_size):
+            chunk = paths[i:i + chunk_size]
+            rows += self.connection.execute('%s WHERE path IN (%s)' % (statement, ', '.join('?' * len(chunk))),
+                                            chunk).fetchall()
+        return rows
+
+    def _select(self, statement, conditions=None, values=None, root=None, ext=None):
+        conditions = [] if conditions is None else list(conditions)
+        values = [] if values is None else list(values)
+        if root is not None:  # prefix match (LIKE would interpret _ and % in paths)
+            root = os.path.join(root, '')
+            conditions.append('substr(path, 1, ?) = ?')
+            values += [len(root), root]
+        if ext:
+            conditions.append('substr(path, ?) = ?')
+            values += [-len(ext), ext]
+        if conditions:
+            statement += ' WHERE ' + ' AND '.join(conditions)
+        return self.connection.execute(statement, values).fetchall()
+
+
+def read_header_entry(path, date_parser=None):
+    """
+    Read the catalog entry of a file from the FITS header (without loading the data).
+
+    Args:
+        path (str): Path to the FITS file.
+        date_parser: Date parser for files without observation date in the header (default: parse the basename).
+
+    Returns:
+        tuple: (instrument, wavelength, date, year, month, shape_x, shape_y, exposure, quality)
+    """
+    with fits.open(path, lazy_load_hdus=True) as hdul:
+        headers = [hdu.header for hdu in hdul]
+    # header of the image (compressed files store the image in the first extension)
+    header = next((h for h in headers if h.get('NAXIS', 0) >= 2), headers[0])
+    primary = headers[0]
+
+    def get(*keys):
+        for key in keys:
+            for h in [header, primary]:
+                if h.get(key) not in [None, '']:
+                    return h[key]
+        return None
+
+    date = get('DATE-OBS', 'DATE_OBS', 'T_OBS')
+    if date is not None and 'T' not in str(date) and get('TIME-OBS') is not None:
+        date = '%sT%s' % (date, get('TIME-OBS'))
+    try:
+        date = parse(str(date).replace('_TAI', '').rstrip('Z')) if date is not None else None
+    except ValueError:
+        date = None
+    if date is None:
+        date = date_parser(path) if date_parser is not None else parse(os.path.basename(path).split('.')[0])
+    date = date.replace(tzinfo=None)
+
+    instrument = get('INSTRUME', 'TELESCOP', 'DETECTOR')
+    wavelength = get('WAVELNTH')
+    exposure = get('EXPTIME')
+    quality = get('QUALITY')
+    return (None if instrument is None else str(instrument).strip(),
+            _to_number(wavelength, float), _format_date(date), date.year, date.month,
+            header.get('NAXIS1'), header.get('NAXIS2'),
+            _to_number(exposure, float), _to_number(quality, int))
+
+
+def _scan(root, ext):
+    # recursive scandir (file stats without additional system calls)
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=True):
+                    stack.append(entry.path)
+                elif ext is None or entry.name.endswith(ext):
+                    stat = entry.stat()
+                    yield entry.path, (stat.st_size, stat.st_mtime_ns)
+
+
+def _format_date(date):
+    return date.isoformat(timespec='microseconds')
+
+
+def _to_number(value, type):
+    try:
+        return None if value is None else type(value)
+    except (TypeError, ValueError):
+        return None
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Create or update the observation catalog of a data directory.')
+    parser.add_argument('--data_path', type=str, help='Path to the data directory.')
+    parser.add_argument('--catalog_path', type=str, help='Path to the catalog database.')
+    parser.add_argument('--ext', type=str, default='.fits', help='File extension.')
+    parser.add_argument('--n_workers', type=int, default=4, help='Number of worker processes.')
+    args = parser.parse_args()
+
+    catalog = ObservationCatalog(args.catalog_path)
+    n_updated = catalog.update(args.data_path, ext=args.ext, n_workers=args.n_workers)
+    print('Updated %d entries (%d observations)' % (n_updated, len(catalog)))
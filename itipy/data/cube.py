@@ -0,0 +1,169 @@
+import json
+
+import h5py
+import numpy as np
+from sunpy.map import Map
+
+
+class MapCube:
+    """
+    Chunked and compressed (time, channel, y, x) cube of translated observations (HDF5).
+
+    Each appended frame stores the data of all channels, the observation time and the metadata (WCS and header) of
+    each channel. The number of complete frames is written last, such that an interrupted run can be resumed
+    (incomplete frames are discarded when the cube is reopened). Time ranges and regions are read without loading
+    the full cube.
+
+    Args:
+        path (str): Path to the HDF5 file.
+        channels (list): Names of the channels (required for new cubes).
+        chunks (tuple): Chunk shape (time, channel, y, x) of new cubes; y and x are limited to the image shape.
+        compression (str): HDF5 compression filter ('gzip' or 'lzf').
+        compression_opts (int): Compression level (gzip).
+        dtype: Data type of new cubes.
+        mode (str): 'a' to create or append, 'r' for read-only access.
+    """
+
+    def __init__(self, path, channels=None, chunks=(1, 1, 256, 256), compression='gzip', compression_opts=4,
+                 dtype=np.float32, mode='a'):
+        self.path = path
+        self.chunks = chunks
+        self.compression = compression
+        self.compression_opts = compression_opts if compression == 'gzip' else None
+        self.dtype = np.dtype(dtype)
+        self.file = h5py.File(path, mode)
+        if 'channels' in self.file.attrs:
+            self.channels = json.loads(self.file.attrs['channels'])
+            assert channels is None or list(channels) == self.channels, \
+                'Invalid channels %s for cube with channels %s' % (channels, self.channels)
+            if mode != 'r':
+                self._truncate(int(self.file.attrs['n_frames']))
+        else:
+            assert channels is not None, 'Channels are required for new cubes'
+            self.channels = list(channels)
+            self.file.attrs['channels'] = json.dumps([str(c) for c in self.channels])
+            self.file.attrs['n_frames'] = 0
+        n_frames = int(self.file.attrs['n_frames'])
+        self._times = self.file['time'][:n_frames] if 'time' in self.file else np.zeros(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self._times)
+
+    def __contains__(self, date):
+        return np.datetime64(date, 'ns').astype(np.int64) in self._times
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def dates(self):
+        return self._times.astype('datetime64[ns]')
+
+    def append(self, maps, date=None):
+        """
+        Append a frame.
+
+        Args:
+            maps (list): SunPy maps of the channels (or a single map).
+            date (datetime): Observation time of the frame (default: date of the first map).
+        """
+        maps = maps if isinstance(maps, (list, tuple)) else [maps]
+        assert len(maps) == len(self.channels), 'Expected %d channels, got %d' % (len(self.channels), len(maps))
+        frame = np.stack([s_map.data for s_map in maps]).astype(self.dtype)
+        date = maps[0].date.datetime if date is None else date
+        headers = [json.dumps(dict(s_map.meta), default=str) for s_map in maps]
+        if 'data' not in self.file:
+            self._create(frame.shape[1:])
+        assert frame.shape[1:] == self.file['data'].shape[2:], \
+            'Invalid frame shape %s for cube with shape %s' % (frame.shape[1:], self.file['data'].shape[2:])
+        n_frames = len(self)
+        for name in ['data', 'time', 'header']:
+            self.file[name].resize(n_frames + 1, axis=0)
+        self.file['data'][n_frames] = frame
+        self.file['time'][n_frames] = np.datetime64(date, 'ns').astype(np.int64)
+        self.file['header'][n_frames] = headers
+        self.file.attrs['n_frames'] = n_frames + 1  # commit the frame
+        self.file.flush()
+        self._times = np.append(self._times, np.datetime64(date, 'ns').astype(np.int64))
+
+    def extend(self, frames, skip_existing=True):
+        """
+        Append multiple frames (e.g., the results of a translator).
+
+        Args:
+            frames (iterable): Lists of SunPy maps.
+            skip_existing (bool): Skip frames with an observation time that is already in the cube (resume).
+        """
+        for maps in frames:
+            first = maps[0] if isinstance(maps, (list, tuple)) else maps
+            if skip_existing and first.date.datetime in self:
+                continue
+            self.append(maps)
+
+    def select(self, start=None, end=None, channels=None, region=None):
+        """
+        Read a time range and region of the cube.
+
+        Args:
+            start (datetime): Start of the time range (inclusive).
+            end (datetime): End of the time range (exclusive).
+            channels (list): Channels to read (default: all).
+            region (tuple): Slices (y, x) of the region.
+
+        Returns:
+            tuple: data (time, channel, y, x), observation times (np.datetime64).
+        """
+        condition = np.ones(len(self), dtype=bool)
+        if start is not None:
+            condition &= self._times >= np.datetime64(start, 'ns').astype(np.int64)
+        if end is not None:
+            condition &= self._times < np.datetime64(end, 'ns').astype(np.int64)
+        frames = np.flatnonzero(condition)
+        channel_idx = slice(None) if channels is None else [self.channels.index(c) for c in channels]
+        y_slice, x_slice = (slice(None), slice(None)) if region is None else region
+        if len(frames) == 0:
+            return np.zeros((0,) + self.file['data'].shape[1:], dtype=self.dtype), self.dates[frames]
+        # contiguous time ranges are read with a single slice
+        frame_idx = slice(frames[0], frames[-1] + 1) if frames[-1] - frames[0] + 1 == len(frames) else frames
+        data = self.file['data'][frame_idx, :, y_slice, x_slice]
+        if channels is not None:
+            data = data[:, channel_idx]
+        return data, self.dates[frames]
+
+    def getMaps(self, index):
+        """
+        Load a frame as SunPy maps.
+
+        Args:
+            index (int): Index of the frame.
+
+        Returns:
+            list: SunPy maps of the channels.
+        """
+        data = self.file['data'][index]
+        headers = [json.loads(h) for h in self.file['header'][index]]
+        return [Map(d, h) for d, h in zip(data, headers)]
+
+    def close(self):
+        self.file.close()
+
+    def _create(self, shape):
+        n_channels = len(self.channels)
+        chunks = (self.chunks[0], min(self.chunks[1], n_channels), min(self.chunks[2], shape[0]),
+                  min(self.chunks[3], shape[1]))
+        self.file.create_dataset('data', shape=(0, n_channels, *shape), maxshape=(None, n_channels, *shape),
+                                 chunks=chunks, dtype=self.dtype, compression=self.compression,
+                                 compression_opts=self.compression_opts, shuffle=True)
+        self.file.create_dataset('time', shape=(0,), maxshape=(None,), chunks=(1024,), dtype=np.int64)
+        self.file.create_dataset('header', shape=(0, n_channels), maxshape=(None, n_channels), chunks=(64, n_channels),
+                                 dtype=h5py.string_dtype(), compression=self.compression,
+                                 compression_opts=self.compression_opts)
+
+    def _truncate(self, n_frames):
+        # discard frames of an interrupted append
+        for name in ['data', 'time', 'header']:
+            if name in self.file and self.file[name].shape[0] > n_frames:
+                self.file[name].resize(n_frames, axis=0)
@@ -1,4 +1,3 @@
-import gc
 import glob
 import logging
 import os
@@ -11,15 +10,18 @@ import numpy as np
 from astropy.visualization import AsinhStretch
 from dateutil.parser import parse
 from torch.utils.data import Dataset, DataLoader
-from tqdm import tqdm
 
-from itipy.data.editor import Editor, LoadMapEditor, KSOPrepEditor, NormalizeRadiusEditor, \
+from itipy.data.cache import EditorCache, UncacheableError, get_fingerprint
+from itipy.data.catalog import ObservationCatalog
+from itipy.data.editor import Editor, LoadMapEditor, LazyLoadMapEditor, KSOPrepEditor, NormalizeRadiusEditor, \
     MapToDataEditor, ImageNormalizeEditor, ReshapeEditor, sdo_norms, NormalizeEditor, \
     AIAPrepEditor, RemoveOffLimbEditor, StackEditor, soho_norms, NanEditor, LoadFITSEditor, \
     KSOFilmPrepEditor, ScaleEditor, ExpandDimsEditor, FeaturePatchEditor, EITCheckEditor, NormalizeExposureEditor, \
     PassEditor, BrightestPixelPatchEditor, stereo_norms, LimbDarkeningCorrectionEditor, hinode_norms, gregor_norms, \
     LoadGregorGBandEditor, DistributeEditor, RecenterEditor, SECCHIPrepEditor, \
-    SOHOFixHeaderEditor, PaddingEditor, hri_norm, proba2_norm, solo_norm
+    SOHOFixHeaderEditor, PaddingEditor, hri_norm, proba2_norm, solo_norm, fuse_editors
+from itipy.data.matching import match_nearest
+from itipy.data.storage import ShardedStore, atomic_write, convert_samples
 
 
 class Norm(Enum):
@@ -98,12 +100,22 @@ class BaseDataset(Dataset):
         limit (int): Limit of samples
         months (list): List of months
         date_parser: Date parser
+        cache (EditorCache): Persistent cache for the converted samples
+        fuse (bool): Fuse runs of array editors into a single in-place float32 editor (opt-in; float32 output that
+            agrees with the unfused editors within FUSION_TOLERANCE, see fuse_editors)
+        catalog (ObservationCatalog): Observation catalog for the file selection (months from the FITS headers)
+        catalog_query (dict): Additional arguments of ObservationCatalog.query (e.g., start, end, quality)
         **kwargs: Additional arguments
     """
 
     def __init__(self, data: Union[str, list], editors: List[Editor], ext: str = None, limit: int = None,
-                 months: list = None, date_parser=None, **kwargs):
-        if isinstance(data, str):
+                 months: list = None, date_parser=None, cache: EditorCache = None, fuse: bool = False,
+                 catalog: ObservationCatalog = None, catalog_query: dict = None, **kwargs):
+        if isinstance(data, str) and catalog is not None:
+            catalog.update(data, ext=ext, date_parser=date_parser)
+            data = catalog.query(data, ext=ext, months=months, **(catalog_query or {}))
+            months = None
+        elif isinstance(data, str):
             pattern = '*' if ext is None else '*' + ext
             data = sorted(glob.glob(os.path.join(data, "**", pattern), recursive=True))
         assert isinstance(data, Iterable), 'Dataset requires list of samples or path to files!'
@@ -115,6 +127,11 @@ class BaseDataset(Dataset):
             data = random.sample(list(data), limit)
         self.data = data
         self.editors = editors
+        self.cache = cache
+        self.fuse = fuse
+        self._fingerprint = None
+        self._cacheable = True
+        self._fused_editors = None
 
         super().__init__()
 
@@ -148,13 +165,33 @@ class BaseDataset(Dataset):
         return os.path.basename(self.data[idx]).split('.')[0]
 
     def convertData(self, data):
+        if self.cache is None or not self._cacheable:
+            return self._applyEditors(data)
+        if self._fingerprint is None:
+            try:
+                self._fingerprint = get_fingerprint([self.editors, self.fuse])  # fused outputs are float32
+            except UncacheableError as ex:
+                logging.warning('Editors are not cached: %s' % ex)
+                self._cacheable = False
+                return self._applyEditors(data)
+        return self.cache.convert(data, self.editors, self._applyEditors, fingerprint=self._fingerprint)
+
+    def _applyEditors(self, data):
+        editors = self.editors
+        if self.fuse:
+            if self._fused_editors is None:
+                self._fused_editors = fuse_editors(self.editors)
+            editors = self._fused_editors
         kwargs = {}
-        for editor in self.editors:
+        for editor in editors:
             data, kwargs = editor.convert(data, **kwargs)
         return data, kwargs
 
     def addEditor(self, editor):
         self.editors.append(editor)
+        self._fingerprint = None
+        self._cacheable = True
+        self._fused_editors = None
 
 
 class StackDataset(BaseDataset):
@@ -164,13 +201,18 @@ class StackDataset(BaseDataset):
     Args:
         data_sets (list): List of datasets
         limit (int): Limit of samples
+        cache (EditorCache): Persistent cache for the converted samples of each dataset
+        channel_executor (str): Executor for the concurrent loading of the datasets (None, 'thread' or 'process')
         **kwargs: Additional arguments
     """
 
-    def __init__(self, data_sets, limit=None, **kwargs):
+    def __init__(self, data_sets, limit=None, cache=None, channel_executor=None, **kwargs):
         self.data_sets = data_sets
+        if cache is not None:
+            for ds in data_sets:
+                ds.cache = cache
 
-        editors = [StackEditor(data_sets)]
+        editors = [StackEditor(data_sets, executor=channel_executor)]
         super().__init__(list(range(len(data_sets[0]))), editors, limit=limit)
 
     def getId(self, idx):
@@ -181,23 +223,37 @@ class StorageDataset(Dataset):
     """
     Dataset for storing data to accelerate training
 
+    The samples are either stored as individual .npy files or in a sharded store (ShardedStore). Samples that are
+    missing in the sharded store are converted on the fly; use ``convert`` to build the store.
+
+    If the first external editor is a BrightestPixelPatchEditor, the candidate patch centers are computed once per
+    sample and stored next to the sample (.npy: <store_dir>/<key>/<id>.npy; sharded store: <id>:<key>).
+
     Args:
         dataset (BaseDataset): Dataset
         store_dir (str): Storage directory
         ext_editors (list): List of editors
+        sharded (bool): Use the sharded store instead of individual .npy files
     """
 
-    def __init__(self, dataset: BaseDataset, store_dir, ext_editors=[]):
+    def __init__(self, dataset: BaseDataset, store_dir, ext_editors=[], sharded=False):
         self.dataset = dataset
         self.store_dir = store_dir
         self.ext_editors = ext_editors
         os.makedirs(store_dir, exist_ok=True)
+        self.store = ShardedStore(store_dir) if sharded else None
+        self.patch_index_editor = None
+        if len(ext_editors) > 0 and isinstance(ext_editors[0], BrightestPixelPatchEditor):
+            self.patch_index_editor = ext_editors[0]
 
     def __len__(self):
         return len(self.dataset)
 
     def __getitem__(self, idx):
         id = self.dataset.getId(idx)
+        if self.store is not None:
+            data = self.store.get(id) if id in self.store else self.dataset[idx]
+            return self.convertData(data, **self._getPatchIndex(id, data))
         store_path = os.path.join(self.store_dir, '%s.npy' % id)
         if os.path.exists(store_path):
             try:
@@ -205,16 +261,43 @@ class StorageDataset(Dataset):
             except Exception as ex:
                 logging.error('Unable to load %s: %s' % (store_path, ex))
                 data = self.dataset[idx]
-                np.save(store_path, data)
-            data = self.convertData(data)
+                self._save(store_path, data)
+            data = self.convertData(data, **self._getPatchIndex(id, data))
             return data
         data = self.dataset[idx]
-        np.save(store_path, data)
-        data = self.convertData(data)
+        self._save(store_path, data)
+        data = self.convertData(data, **self._getPatchIndex(id, data))
         return data
 
-    def convertData(self, data):
-        kwargs = {}
+    def _save(self, store_path, data):
+        # interrupted writes leave no partial samples
+        with atomic_write(store_path) as tmp_path, open(tmp_path, 'wb') as f:
+            np.save(f, data)
+
+    def _getPatchIndex(self, id, data):
+        if self.patch_index_editor is None:
+            return {}
+        key = self._patchIndexKey()
+        if self.store is not None:
+            if '%s:%s' % (id, key) in self.store:
+                return {'candidates': self.store.get('%s:%s' % (id, key)).astype(int)}
+            # the sharded store is only written by convert
+            return {'candidates': self.patch_index_editor.getCandidates(data)}
+        index_path = os.path.join(self.store_dir, key, '%s.npy' % id)
+        if os.path.exists(index_path):
+            try:
+                return {'candidates': np.load(index_path)}
+            except Exception as ex:
+                logging.error('Unable to load %s: %s' % (index_path, ex))
+        candidates = self.patch_index_editor.getCandidates(data)
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        self._save(index_path, candidates)
+        return {'candidates': candidates}
+
+    def _patchIndexKey(self):
+        return 'brightest_pixel_c%d_k%d' % (self.patch_index_editor.idx, self.patch_index_editor.top_k)
+
+    def convertData(self, data, **kwargs):
         for editor in self.ext_editors:
             data, kwargs = editor.convert(data, **kwargs)
         return data
@@ -231,21 +314,44 @@ class StorageDataset(Dataset):
         del it
         return np.concatenate(samples)
 
-    def convert(self, n_worker):
-        it = DataLoader(self, batch_size=1, shuffle=False, num_workers=n_worker).__iter__()
-        for i in tqdm(range(len(self.dataset))):
-            try:
-                next(it)
-                gc.collect()
-            except StopIteration:
-                return
-            except Exception as ex:
-                logging.error('Invalid data: %s' % self.dataset.data[i])
-                logging.error(str(ex))
-                continue
+    def convert(self, n_worker, retry_failed=False, max_in_flight=None, flush_interval=100):
+        """
+        Convert all samples of the dataset with a process pool (see convert_samples and ShardedStore.build).
+
+        Converted ids are obtained from the index of the store (or a single listing of the .npy files), such that an
+        interrupted conversion resumes without redoing completed samples. Failed samples are recorded with the reason
+        in the failure manifest (failures.json) and skipped in subsequent runs unless retry_failed is set.
+
+        Args:
+            n_worker (int): Number of worker processes.
+            retry_failed (bool): Retry the samples of the failure manifest.
+            max_in_flight (int): Maximum number of pending samples (default: 2 * n_worker).
+            flush_interval (int): Number of samples after which the index and the manifest are written.
+
+        Returns:
+            list: invalid data entries (e.g., files) of the dataset.
+        """
+        if self.store is not None:
+            return self.store.build(self.dataset, n_worker, flush_interval, retry_failed, max_in_flight,
+                                    convert_fn=self._convertSample)
+        converted_ids = {e.name[:-len('.npy')] for e in os.scandir(self.store_dir) if e.name.endswith('.npy')}
+        return convert_samples(self.dataset, self._convertSample, converted_ids,
+                               os.path.join(self.store_dir, 'failures.json'), n_workers=n_worker,
+                               retry_failed=retry_failed, max_in_flight=max_in_flight, flush_interval=flush_interval)
+
+    def _convertSample(self, idx):
+        id = self.dataset.getId(idx)
+        data = self.dataset[idx]
+        if self.store is not None:  # samples of the sharded store are written by ShardedStore.build
+            patch_index = {} if self.patch_index_editor is None else \
+                {self._patchIndexKey(): self.patch_index_editor.getCandidates(data)}
+            return data, patch_index
+        self._save(os.path.join(self.store_dir, '%s.npy' % id), data)
+        self._getPatchIndex(id, data)
 
 
-def get_intersecting_files(path, dirs, months=None, years=None, n_samples=None, ext=None, basenames=None, **kwargs):
+def get_intersecting_files(path, dirs, months=None, years=None, n_samples=None, ext=None, basenames=None,
+                           catalog=None, catalog_query=None, **kwargs):
     """
     Get intersecting files from multiple directories
 
@@ -257,13 +363,25 @@ def get_intersecting_files(path, dirs, months=None, years=None, n_samples=None,
         n_samples (int): Number of samples
         ext (str): File extension
         basenames (list): List of basenames
+        catalog (ObservationCatalog): Observation catalog for the file selection (months and years from the
+            FITS headers)
+        catalog_query (dict): Additional arguments of ObservationCatalog.query (e.g., start, end, quality)
         **kwargs: Additional arguments
 
     Returns:
         list: List of intersecting files
     """
     pattern = '*' if ext is None else '*' + ext
-    if basenames is None:
+    if basenames is None and catalog is not None:
+        basenames = []
+        for d in dirs:
+            dir_path = os.path.join(path, str(d))
+            catalog.update(dir_path, ext=ext)
+            files = catalog.query(dir_path, ext=ext, months=months, years=years, **(catalog_query or {}))
+            basenames.append([os.path.basename(f) for f in files])
+        basenames = list(set(basenames[0]).intersection(*basenames))
+        months, years = None, None
+    elif basenames is None:
         basenames = [
             [os.path.basename(path) for path in glob.glob(os.path.join(path, str(d), '**', pattern), recursive=True)]
             for d in dirs]
@@ -278,6 +396,61 @@ def get_intersecting_files(path, dirs, months=None, years=None, n_samples=None,
     return [[os.path.join(path, str(dir), b) for b in basenames] for dir in dirs]
 
 
+def get_matching_files(path, dirs, tolerance=None, policy='many-to-one', reference=0, months=None, years=None,
+                       n_samples=None, ext=None, basenames=None, catalog=None, catalog_query=None, date_parser=None,
+                       **kwargs):
+    """
+    Get files from multiple directories that are matched by their nearest observation time (see match_nearest)
+
+    Args:
+        path (str): Path to directories
+        dirs (list): List of directories
+        tolerance (timedelta): Maximum time difference to the reference directory
+        policy (str): Matching policy ('many-to-one' or 'one-to-one')
+        reference (int): Index of the reference directory
+        months (list): List of months (of the reference observations)
+        years (list): List of years (of the reference observations)
+        n_samples (int): Number of samples
+        ext (str): File extension
+        basenames (list): List of basenames of the reference observations
+        catalog (ObservationCatalog): Observation catalog for the observation times (default: parse the basenames)
+        catalog_query (dict): Additional arguments of ObservationCatalog.query (e.g., start, end, quality)
+        date_parser: Date parser for the file paths (default: parse the basename)
+        **kwargs: Additional arguments
+
+    Returns:
+        list: List of matched files
+    """
+    pattern = '*' if ext is None else '*' + ext
+    if date_parser is None:
+        date_parser = lambda f: parse(os.path.basename(f).split('.')[0])
+    files, dates = [], []
+    for d in dirs:
+        dir_path = os.path.join(path, str(d))
+        if catalog is not None:
+            catalog.update(dir_path, ext=ext, date_parser=date_parser)
+            dir_files, dir_dates = catalog.query(dir_path, ext=ext, with_dates=True, **(catalog_query or {}))
+        else:
+            dir_files = sorted(glob.glob(os.path.join(dir_path, '**', pattern), recursive=True))
+            dir_dates = [date_parser(f) for f in dir_files]
+        files.append(np.array(dir_files))
+        dates.append(np.array(dir_dates, dtype='datetime64[ns]'))
+    if basenames is not None:
+        selected = np.isin([os.path.basename(f) for f in files[reference]], list(basenames))
+        files[reference], dates[reference] = files[reference][selected], dates[reference][selected]
+    indices = match_nearest(dates, tolerance, policy, reference)
+    reference_dates = dates[reference][indices[reference]]
+    condition = np.ones(len(reference_dates), dtype=bool)
+    if months:
+        condition &= np.isin(reference_dates.astype('datetime64[M]').astype(int) % 12 + 1, months)
+    if years:
+        condition &= np.isin(reference_dates.astype('datetime64[Y]').astype(int) + 1970, years)
+    indices = [idx[condition] for idx in indices]
+    if n_samples:
+        indices = [idx[::len(idx) // n_samples] for idx in indices]
+    return [list(f[idx]) for f, idx in zip(files, indices)]
+
+
 class SDODataset(StackDataset):
     """
     Dataset for SDO data
@@ -288,17 +461,23 @@ class SDODataset(StackDataset):
         wavelengths (list): List of wavelengths
         resolution (int): Resolution
         ext (str): File extension
+        radius_engine (str): Resampling engine of the NormalizeRadiusEditor ('sunpy' or 'affine')
+        match_tolerance (timedelta): Match the channels by the nearest observation time within the tolerance
+            (see get_matching_files) instead of identical basenames
         **kwargs: Additional arguments
     """
 
-    def __init__(self, data, patch_shape=None, wavelengths=None, resolution=2048, ext='.fits', **kwargs):
+    def __init__(self, data, patch_shape=None, wavelengths=None, resolution=2048, ext='.fits', radius_engine='sunpy',
+                 match_tolerance=None, **kwargs):
         wavelengths = [171, 193, 211, 304, 6173, ] if wavelengths is None else wavelengths
         if isinstance(data, list):
             paths = data
         else:
-            paths = get_intersecting_files(data, wavelengths, ext=ext, **kwargs)
+            paths = get_intersecting_files(data, wavelengths, ext=ext, **kwargs) if match_tolerance is None else \
+                get_matching_files(data, wavelengths, ext=ext, tolerance=match_tolerance, **kwargs)
         ds_mapping = {171: AIADataset, 193: AIADataset, 211: AIADataset, 304: AIADataset, 6173: HMIDataset}
-        data_sets = [ds_mapping[wl_id](files, wavelength=wl_id, resolution=resolution, ext=ext)
+        data_sets = [ds_mapping[wl_id](files, wavelength=wl_id, resolution=resolution, ext=ext,
+                                       radius_engine=radius_engine)
                      for wl_id, files in zip(wavelengths, paths)]
 
         super().__init__(data_sets, **kwargs)
@@ -316,18 +495,23 @@ class SOHODataset(StackDataset):
         wavelengths (list): List of wavelengths
         resolution (int): Resolution
         ext (str): File extension
+        radius_engine (str): Resampling engine of the NormalizeRadiusEditor ('sunpy' or 'affine')
+        match_tolerance (timedelta): Match the channels by the nearest observation time within the tolerance
+            (see get_matching_files) instead of identical basenames
         **kwargs: Additional arguments
     """
 
-    def __init__(self, data, patch_shape=None, resolution=1024, ext='.fits', wavelengths=None, **kwargs):
+    def __init__(self, data, patch_shape=None, resolution=1024, ext='.fits', wavelengths=None, radius_engine='sunpy',
+                 match_tolerance=None, **kwargs):
         wavelengths = [171, 195, 284, 304, 'mag', ] if wavelengths is None else wavelengths
         if isinstance(data, list):
             paths = data
         else:
-            paths = get_intersecting_files(data, wavelengths, ext=ext, **kwargs)
+            paths = get_intersecting_files(data, wavelengths, ext=ext, **kwargs) if match_tolerance is None else \
+                get_matching_files(data, wavelengths, ext=ext, tolerance=match_tolerance, **kwargs)
 
         ds = {171: EITDataset, 195: EITDataset, 284: EITDataset, 304: EITDataset, 'mag': MDIDataset}
-        data_sets = [ds[wl_id](files, wavelength=wl_id, resolution=resolution, ext=ext)
+        data_sets = [ds[wl_id](files, wavelength=wl_id, resolution=resolution, ext=ext, radius_engine=radius_engine)
                      for wl_id, files in zip(wavelengths, paths)]
 
         super().__init__(data_sets, **kwargs)
@@ -343,18 +527,23 @@ class STEREODataset(StackDataset):
         data: Data
         patch_shape (tuple): Patch shape
         resolution (int): Resolution
+        radius_engine (str): Resampling engine of the NormalizeRadiusEditor ('sunpy' or 'affine')
+        match_tolerance (timedelta): Match the channels by the nearest observation time within the tolerance
+            (see get_matching_files) instead of identical basenames
         **kwargs: Additional arguments
     """
 
-    def __init__(self, data, patch_shape=None, resolution=1024, **kwargs):
+    def __init__(self, data, patch_shape=None, resolution=1024, radius_engine='sunpy', match_tolerance=None, **kwargs):
         if isinstance(data, list):
             paths = data
         else:
-            paths = get_intersecting_files(data, ['171', '195', '284', '304'], **kwargs)
-        data_sets = [SECCHIDataset(paths[0], 171, resolution=resolution),
-                     SECCHIDataset(paths[1], 195, resolution=resolution),
-                     SECCHIDataset(paths[2], 284, resolution=resolution),
-                     SECCHIDataset(paths[3], 304, resolution=resolution, degradation=[-9.42497209e-05, 2.27153104e+00]),
+            paths = get_intersecting_files(data, ['171', '195', '284', '304'], **kwargs) if match_tolerance is None else \
+                get_matching_files(data, ['171', '195', '284', '304'], tolerance=match_tolerance, **kwargs)
+        data_sets = [SECCHIDataset(paths[0], 171, resolution=resolution, radius_engine=radius_engine),
+                     SECCHIDataset(paths[1], 195, resolution=resolution, radius_engine=radius_engine),
+                     SECCHIDataset(paths[2], 284, resolution=resolution, radius_engine=radius_engine),
+                     SECCHIDataset(paths[3], 304, resolution=resolution, degradation=[-9.42497209e-05, 2.27153104e+00],
+                                   radius_engine=radius_engine),
                      ]
         super().__init__(data_sets, **kwargs)
         if patch_shape is not None:
@@ -370,16 +559,17 @@ class EITDataset(BaseDataset):
         wavelength (int): Wavelength
         resolution (int): Resolution
         ext (str): File extension
+        radius_engine (str): Resampling engine of the NormalizeRadiusEditor ('sunpy' or 'affine')
         **kwargs: Additional arguments
     """
 
-    def __init__(self, data, wavelength, resolution=1024, ext='.fits', **kwargs):
+    def __init__(self, data, wavelength, resolution=1024, ext='.fits', radius_engine='sunpy', **kwargs):
         norm = soho_norms[wavelength]
 
         editors = [LoadMapEditor(),
                    EITCheckEditor(),
                    SOHOFixHeaderEditor(),
-                   NormalizeRadiusEditor(resolution),
+                   NormalizeRadiusEditor(resolution, engine=radius_engine),
                    MapToDataEditor(),
                    NormalizeEditor(norm),
                    ReshapeEditor((1, resolution, resolution))]
@@ -395,14 +585,15 @@ class MDIDataset(BaseDataset):
         wavelength (int): Wavelength
         resolution (int): Resolution
         ext (str): File extension
+        radius_engine (str): Resampling engine of the NormalizeRadiusEditor ('sunpy' or 'affine')
         **kwargs: Additional arguments
     """
 
-    def __init__(self, data, resolution=1024, ext='.fits', **kwargs):
+    def __init__(self, data, resolution=1024, ext='.fits', radius_engine='sunpy', **kwargs):
         norm = soho_norms[6173]
         editors = [LoadMapEditor(),
                    SOHOFixHeaderEditor(),
-                   NormalizeRadiusEditor(resolution),
+                   NormalizeRadiusEditor(resolution, engine=radius_engine),
                    RemoveOffLimbEditor(),
                    MapToDataEditor(),
                    NanEditor(),
@@ -421,14 +612,17 @@ class AIADataset(BaseDataset):
         resolution (int): Resolution
         ext (str): File extension
         calibration (str): Calibration type
+        radius_engine (str): Resampling engine of the NormalizeRadiusEditor ('sunpy' or 'affine')
+        lazy_load (bool): Load the files with the LazyLoadMapEditor
         **kwargs: Additional arguments
     """
 
-    def __init__(self, data, wavelength, resolution=2048, ext='.fits', calibration='auto', **kwargs):
+    def __init__(self, data, wavelength, resolution=2048, ext='.fits', calibration='auto', radius_engine='sunpy',
+                 lazy_load=False, **kwargs):
         norm = sdo_norms[wavelength]
 
-        editors = [LoadMapEditor(),
-                   NormalizeRadiusEditor(resolution),
+        editors = [LazyLoadMapEditor() if lazy_load else LoadMapEditor(),
+                   NormalizeRadiusEditor(resolution, engine=radius_engine),
                    AIAPrepEditor(calibration=calibration),
                    MapToDataEditor(),
                    NormalizeEditor(norm),
@@ -445,14 +639,16 @@ class HMIDataset(BaseDataset):
         id (int): ID
         resolution (int): Resolution
         ext (str): File extension
+        radius_engine (str): Resampling engine of the NormalizeRadiusEditor ('sunpy' or 'affine')
+        lazy_load (bool): Load the files with the LazyLoadMapEditor
         **kwargs: Additional arguments
     """
 
-    def __init__(self, data, id='mag', resolution=2048, ext='.fits', **kwargs):
+    def __init__(self, data, id='mag', resolution=2048, ext='.fits', radius_engine='sunpy', lazy_load=False, **kwargs):
         norm = sdo_norms[id]
 
-        editors = [LoadMapEditor(),
-                   NormalizeRadiusEditor(resolution),
+        editors = [LazyLoadMapEditor() if lazy_load else LoadMapEditor(),
+                   NormalizeRadiusEditor(resolution, engine=radius_engine),
                    RemoveOffLimbEditor(),
                    MapToDataEditor(),
                    PaddingEditor((resolution, resolution)),  # fix field-of-view of subframe
@@ -493,14 +689,15 @@ class SDOMLDataset(BaseDataset):
     Args:
         data: Data
         patch_shape (tuple): Patch shape
+        radius_engine (str): Resampling engine of the NormalizeRadiusEditor ('sunpy' or 'affine')
         **kwargs: Additional arguments
     """
 
-    def __init__(self, data, wavelength, resolution=2048, ext='.fits', **kwargs):
+    def __init__(self, data, wavelength, resolution=2048, ext='.fits', radius_engine='sunpy', **kwargs):
         norm = sdo_norms[wavelength]
 
         editors = [LoadMapEditor(),
-                   NormalizeRadiusEditor(resolution),
+                   NormalizeRadiusEditor(resolution, engine=radius_engine),
                    AIAPrepEditor(),
                    MapToDataEditor(),
                    NormalizeEditor(norm),
@@ -516,13 +713,14 @@ class HinodeDataset(BaseDataset):
         data: Data
         scale (float): Scale
         wavelength (str): Wavelength
+        lazy_load (bool): Load the files with the LazyLoadMapEditor
         **kwargs: Additional arguments
     """
 
-    def __init__(self, data, scale=0.15, wavelength='continuum', **kwargs):
+    def __init__(self, data, scale=0.15, wavelength='continuum', lazy_load=False, **kwargs):
         norm = hinode_norms[wavelength]
 
-        editors = [LoadMapEditor(),
+        editors = [LazyLoadMapEditor() if lazy_load else LoadMapEditor(),
                    ScaleEditor(scale),
                    NormalizeExposureEditor(),
                    MapToDataEditor(),
@@ -541,15 +739,16 @@ class SECCHIDataset(BaseDataset):
         wavelength (int): Wavelength
         resolution (int): Resolution
         degradation (list): Degradation
+        radius_engine (str): Resampling engine of the NormalizeRadiusEditor ('sunpy' or 'affine')
         **kwargs: Additional arguments
     """
 
-    def __init__(self, data, wavelength, resolution=1024, degradation=None, **kwargs):
+    def __init__(self, data, wavelength, resolution=1024, degradation=None, radius_engine='sunpy', **kwargs):
         norm = stereo_norms[wavelength]
 
         editors = [LoadMapEditor(),
                    SECCHIPrepEditor(degradation),
-                   NormalizeRadiusEditor(resolution),
+                   NormalizeRadiusEditor(resolution, engine=radius_engine),
                    MapToDataEditor(),
                    NormalizeEditor(norm),
                    ReshapeEditor((1, resolution, resolution))]
@@ -564,13 +763,14 @@ class KSODataset(BaseDataset):
         data: Data
         resolution (int): Resolution
         ext (str): File extension
+        radius_engine (str): Resampling engine of the NormalizeRadiusEditor ('sunpy' or 'affine')
         **kwargs: Additional arguments
     """
 
-    def __init__(self, data: Union[str, list], resolution=256, ext=".fts.gz", **kwargs):
+    def __init__(self, data: Union[str, list], resolution=256, ext=".fts.gz", radius_engine='sunpy', **kwargs):
         editors = [LoadMapEditor(),
                    KSOPrepEditor(),
-                   NormalizeRadiusEditor(resolution),
+                   NormalizeRadiusEditor(resolution, engine=radius_engine),
                    MapToDataEditor(),
                    ImageNormalizeEditor(0, 1000),
                    ReshapeEditor((1, resolution, resolution))]
@@ -586,14 +786,17 @@ class KSOFlatDataset(BaseDataset):
         resolution (int): Resolution
         ext (str): File extension
         date_parser: Date parser
+        radius_engine (str): Resampling engine of the NormalizeRadiusEditor ('sunpy' or 'affine')
+        limb_darkening_bins (int): Number of radial bins of the fast limb darkening fit (None to fit all pixels)
         **kwargs: Additional arguments
     """
 
-    def __init__(self, data, resolution=256, ext=".fts.gz", date_parser=None, **kwargs):
+    def __init__(self, data, resolution=256, ext=".fts.gz", date_parser=None, radius_engine='sunpy',
+                 limb_darkening_bins=None, **kwargs):
         editors = [LoadMapEditor(),
                    KSOPrepEditor(),
-                   NormalizeRadiusEditor(resolution, 0),
-                   LimbDarkeningCorrectionEditor(),
+                   NormalizeRadiusEditor(resolution, 0, engine=radius_engine),
+                   LimbDarkeningCorrectionEditor(n_bins=limb_darkening_bins),
                    MapToDataEditor(),
                    ImageNormalizeEditor(0.65, 1.5, stretch=AsinhStretch(0.5)),
                    NanEditor(-1),
@@ -612,14 +815,17 @@ class KSOFilmDataset(BaseDataset):
         resolution (int): Resolution
         ext (str): File extension
         date_parser: Date parser
+        radius_engine (str): Resampling engine of the NormalizeRadiusEditor ('sunpy' or 'affine')
+        limb_darkening_bins (int): Number of radial bins of the fast limb darkening fit (None to fit all pixels)
         **kwargs: Additional arguments
     """
 
-    def __init__(self, data, resolution=256, ext=".fts.gz", date_parser=None, **kwargs):
+    def __init__(self, data, resolution=256, ext=".fts.gz", date_parser=None, radius_engine='sunpy',
+                 limb_darkening_bins=None, **kwargs):
         editors = [LoadFITSEditor(),
                    KSOFilmPrepEditor(),
-                   NormalizeRadiusEditor(resolution, 0),
-                   LimbDarkeningCorrectionEditor(),
+                   NormalizeRadiusEditor(resolution, 0, engine=radius_engine),
+                   LimbDarkeningCorrectionEditor(n_bins=limb_darkening_bins),
                    MapToDataEditor(),
                    ImageNormalizeEditor(0.39, 1.94, stretch=AsinhStretch(0.5)),
                    NanEditor(-1),
@@ -684,17 +890,22 @@ class EUIDataset(StackDataset):
         wavelengths (list): List of wavelengths
         resolution (int): Resolution
         ext (str): File extension
+        radius_engine (str): Resampling engine of the NormalizeRadiusEditor ('sunpy' or 'affine')
+        match_tolerance (timedelta): Match the channels by the nearest observation time within the tolerance
+            (see get_matching_files) instead of identical basenames
         **kwargs: Additional arguments
     """
 
-    def __init__(self, data, patch_shape=None, wavelengths=None, resolution=1024, ext='.fits', **kwargs):
+    def __init__(self, data, patch_shape=None, wavelengths=None, resolution=1024, ext='.fits', radius_engine='sunpy',
+                 match_tolerance=None, **kwargs):
         wavelengths = ['eui-fsi174-image', 'eui-fsi304-image'] if wavelengths is None else wavelengths
         if isinstance(data, list):
             paths = data
         else:
-            paths = get_intersecting_files(data, wavelengths, ext=ext, **kwargs)
+            paths = get_intersecting_files(data, wavelengths, ext=ext, **kwargs) if match_tolerance is None else \
+                get_matching_files(data, wavelengths, ext=ext, tolerance=match_tolerance, **kwargs)
         ds = {'eui-fsi174-image': FSIDataset, 'eui-fsi304-image': FSIDataset}
-        data_sets = [ds[wl_id](files, wavelength=wl_id, resolution=resolution, ext=ext)
+        data_sets = [ds[wl_id](files, wavelength=wl_id, resolution=resolution, ext=ext, radius_engine=radius_engine)
                      for wl_id, files in zip(wavelengths, paths)]
 
         super().__init__(data_sets, **kwargs)
@@ -711,14 +922,15 @@ class FSIDataset(BaseDataset):
         wavelength (str): Wavelength
         resolution (int): Resolution
         ext (str): File extension
+        radius_engine (str): Resampling engine of the NormalizeRadiusEditor ('sunpy' or 'affine')
         **kwargs: Additional arguments
     """
 
-    def __init__(self, data, wavelength, resolution=1024, ext='.fits', **kwargs):
+    def __init__(self, data, wavelength, resolution=1024, ext='.fits', radius_engine='sunpy', **kwargs):
         norm = solo_norm[wavelength]
 
         editors = [LoadMapEditor(),
-                   NormalizeRadiusEditor(resolution, fix_irradiance_with_distance=True),
+                   NormalizeRadiusEditor(resolution, fix_irradiance_with_distance=True, engine=radius_engine),
                    MapToDataEditor(),
                    NormalizeEditor(norm),
                    ReshapeEditor((1, resolution, resolution))]
@@ -733,15 +945,16 @@ class HRIDataset(BaseDataset):
         data: Data
         resolution (int): Resolution
         ext (str): File extension
+        radius_engine (str): Resampling engine of the NormalizeRadiusEditor ('sunpy' or 'affine')
         **kwargs: Additional arguments
     """
 
-    def __init__(self, data, resolution=4096, ext='.fits', **kwargs):
+    def __init__(self, data, resolution=4096, ext='.fits', radius_engine='sunpy', **kwargs):
         norm = hri_norm[174]
 
         editors = [LoadMapEditor(),
                    NormalizeRadiusEditor(resolution=resolution, crop=True, rotate_north_up=False,
-                                         fix_irradiance_with_distance=True),
+                                         fix_irradiance_with_distance=True, engine=radius_engine),
                    MapToDataEditor(),
                    NormalizeEditor(norm),
                    ExpandDimsEditor()]
@@ -756,14 +969,16 @@ class SWAPDataset(BaseDataset):
         data: Data
         resolution (int): Resolution
         ext (str): File extension
+        radius_engine (str): Resampling engine of the NormalizeRadiusEditor ('sunpy' or 'affine')
         **kwargs: Additional arguments
     """
 
-    def __init__(self, data, wavelength=174, patch_shape=None, resolution=1024, ext='.fits', **kwargs):
+    def __init__(self, data, wavelength=174, patch_shape=None, resolution=1024, ext='.fits', radius_engine='sunpy',
+                 **kwargs):
         norm = proba2_norm[wavelength]
 
         editors = [LoadMapEditor(),
-                   NormalizeRadiusEditor(resolution),
+                   NormalizeRadiusEditor(resolution, engine=radius_engine),
                    MapToDataEditor(),
                    NormalizeEditor(norm),
                    ReshapeEditor((1, resolution, resolution))]
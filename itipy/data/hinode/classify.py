@@ -6,15 +6,16 @@ from warnings import simplefilter
 
 import numpy as np
 import pandas as pd
-from sunpy.map import Map, all_coordinates_from_map
+from sunpy.map import Map
 from tqdm import tqdm
 
+from itipy.data.editor import get_radial_distance
+
 
 def classify(file):
     simplefilter('ignore')
     s_map = Map(file)
-    hpc_coords = all_coordinates_from_map(s_map)
-    r = np.sqrt(hpc_coords.Tx ** 2 + hpc_coords.Ty ** 2) / s_map.rsun_obs
+    r = get_radial_distance(s_map)
     if np.any(r > 1):
         return (file, 'limb', s_map.date)
     if np.std(s_map.data / s_map.meta['EXPTIME']) < 2500:
@@ -0,0 +1,72 @@
+import numpy as np
+
+
+def match_nearest(dates, tolerance=None, policy='many-to-one', reference=0):
+    """
+    Match observations of multiple channels or instruments by their nearest observation time.
+
+    For each observation of the reference channel, the observation with the closest time is selected from each of the
+    other channels (sorted search, O((N + M) log M)). Observations without a match within the tolerance in all
+    channels are discarded. With the 'one-to-one' policy, each observation is used at most once; conflicts are
+    resolved greedily in favor of the smallest time difference (per channel). Reference observations that lose a
+    conflict are discarded, also if another unused observation lies within the tolerance (no optimal assignment;
+    e.g., for reference times [0, 1] and observations [1, 2] only the pair (1, 1) is kept).
+
+    Args:
+        dates (list): Observation times of each channel (list of datetime or np.datetime64 arrays).
+        tolerance (timedelta): Maximum time difference (None for no limit).
+        policy (str): 'many-to-one' (observations can be matched multiple times) or 'one-to-one'.
+        reference (int): Index of the reference channel.
+
+    Returns:
+        list: Index arrays of the matched observations for each channel (in the order of the reference channel).
+    """
+    assert policy in ['many-to-one', 'one-to-one'], 'Invalid matching policy: %s' % policy
+    timestamps = [_to_timestamps(d) for d in dates]
+    reference_times = timestamps[reference]
+    valid = np.ones(len(reference_times), dtype=bool)
+    indices = []
+    for i, times in enumerate(timestamps):
+        if i == reference:
+            indices.append(np.arange(len(reference_times)))
+            continue
+        idx, difference = _nearest(reference_times, times)
+        matched = np.isfinite(difference)
+        if tolerance is not None:
+            matched &= difference <= np.timedelta64(tolerance, 'ns').astype(np.int64)
+        if policy == 'one-to-one':
+            matched &= _closest_unique(idx, difference, matched)
+        valid &= matched
+        indices.append(idx)
+    return [idx[valid] for idx in indices]
+
+
+def _to_timestamps(dates):
+    # int64 nanoseconds
+    return np.asarray(dates, dtype='datetime64[ns]').astype(np.int64)
+
+
+def _nearest(reference_times, times):
+    if len(times) == 0:
+        return np.zeros(len(reference_times), dtype=np.int64), np.full(len(reference_times), np.inf)
+    order = np.argsort(times, kind='stable')
+    sorted_times = times[order]
+    position = np.searchsorted(sorted_times, reference_times)
+    left = np.clip(position - 1, 0, len(times) - 1)
+    right = np.clip(position, 0, len(times) - 1)
+    left_difference = np.abs(reference_times - sorted_times[left])
+    right_difference = np.abs(sorted_times[right] - reference_times)
+    use_right = right_difference < left_difference
+    idx = order[np.where(use_right, right, left)]
+    return idx, np.where(use_right, right_difference, left_difference)
+
+
+def _closest_unique(idx, difference, matched):
+    # greedy: keep the closest reference observation for each matched observation; the other reference
+    # observations are not reassigned to their second-nearest observation (see match_nearest)
+    candidates = np.flatnonzero(matched)
+    candidates = candidates[np.argsort(difference[candidates], kind='stable')]
+    _, first = np.unique(idx[candidates], return_index=True)
+    unique = np.zeros(len(idx), dtype=bool)
+    unique[candidates[first]] = True
+    return unique
@@ -0,0 +1,135 @@
+import numpy as np
+from astropy.visualization import ImageNormalize, LinearStretch
+
+
+class CompiledNormalize(ImageNormalize):
+    """
+    Replacement of astropy ImageNormalize with fixed limits and vectorized forward (float32) and inverse (float64 by
+    default, as ImageNormalize) transformations (no masked-array machinery).
+
+    Optionally, the stretch and its inverse are evaluated with interpolated float32 lookup tables. The size of the
+    tables is increased until the maximum error (measured on a dense grid of each table interval) is below
+    lut_error.
+    Data-dependent limits (vmin or vmax None), masked arrays and explicit clip/invalid arguments are delegated to
+    ImageNormalize.
+
+    Args:
+        vmin (float): minimum value
+        vmax (float): maximum value
+        stretch (astropy.visualization.stretch.Stretch): stretch function
+        clip (bool): clip the values to [vmin, vmax]
+        lut_error (float): maximum error of the lookup tables (None for the exact stretch)
+        max_lut_size (int): maximum size of the lookup tables
+        inverse_dtype: data type of the inverse transformation (float32 to reduce memory)
+    """
+
+    def __init__(self, vmin=None, vmax=None, stretch=LinearStretch(), clip=True, lut_error=None,
+                 max_lut_size=2 ** 22, inverse_dtype=np.float64):
+        super().__init__(vmin=vmin, vmax=vmax, stretch=stretch, clip=clip)
+        self.lut_error = lut_error
+        self.max_lut_size = max_lut_size
+        self.inverse_dtype = np.dtype(inverse_dtype)
+
+    def __call__(self, values, clip=None, invalid=None):
+        if self.vmin is None or self.vmax is None or clip is not None or invalid is not None or \
+                isinstance(values, np.ma.MaskedArray) or np.isscalar(values):
+            return super().__call__(values, **_optional_kwargs(clip=clip, invalid=invalid))
+        return np.ma.MaskedArray(self.forward(values), copy=False)
+
+    def forward(self, values, out=None):
+        """
+        Normalize the values to [0, 1].
+
+        Args:
+            values (np.ndarray): values
+            out (np.ndarray): float32 output array (e.g., values for in-place normalization)
+
+        Returns:
+            np.ndarray: normalized values (float32)
+        """
+        if out is None:
+            out = np.array(values, dtype=np.float32)
+        elif out is not values:
+            out[...] = values
+        if self.clip:
+            np.clip(out, self.vmin, self.vmax, out=out)
+        out -= self.vmin
+        out /= self.vmax - self.vmin
+        if self.lut_error is None:
+            return self.stretch(out, out=out, clip=False)
+        return _apply_lut(out, *_get_lut(self.stretch, self.lut_error, self.max_lut_size))
+
+    def inverse(self, values, out=None, invalid=None):
+        """
+        Transform normalized values back to data values.
+
+        Args:
+            values (np.ndarray): normalized values
+            out (np.ndarray): output array (e.g., values for in-place transformation)
+            invalid (float): value of invalid data (delegated to ImageNormalize)
+
+        Returns:
+            np.ndarray: data values (inverse_dtype, or the data type of out)
+        """
+        if self.vmin is None or self.vmax is None or invalid is not None or np.isscalar(values):
+            return super().inverse(values, **_optional_kwargs(invalid=invalid))
+        if out is None:
+            out = np.array(values, dtype=self.inverse_dtype)
+        elif out is not values:
+            out[...] = values
+        if self.lut_error is None:
+            out = self.stretch.inverse(out, out=out, clip=False)
+        else:
+            out = _apply_lut(out, *_get_lut(self.stretch.inverse, self.lut_error, self.max_lut_size))
+        out *= self.vmax - self.vmin
+        out += self.vmin
+        return out
+
+
+_luts = {}  # lookup tables of the current process
+
+
+def _get_lut(stretch, max_error, max_size):
+    key = (type(stretch).__qualname__, repr(sorted(vars(stretch).items())), max_error, max_size)
+    if key not in _luts:
+        _luts[key] = _build_lut(stretch, max_error, max_size)
+    return _luts[key]
+
+
+def _build_lut(stretch, max_error, max_size):
+    size = 1024
+    while True:
+        x = np.linspace(0, 1, size + 1)
+        lut = stretch(x, clip=False).astype(np.float32)
+        error = _lut_error(stretch, lut[:-1], np.diff(lut))
+        if error <= max_error or size >= max_size:
+            break
+        size *= 2
+    return lut[:-1], np.diff(lut)
+
+
+def _lut_error(stretch, lut, slope, n_points=8, chunk_size=2 ** 17):
+    # maximum error of the float32 table on a dense grid (n_points + 1 samples per interval, including the nodes)
+    size = len(lut)
+    fractions = np.arange(n_points + 1) / n_points
+    error = 0.
+    for start in range(0, size, chunk_size):
+        idx = np.arange(start, min(start + chunk_size, size))
+        x = (idx[:, None] + fractions[None]) / size
+        approximation = lut[idx, None] + fractions[None] * slope[idx, None]
+        error = max(error, np.nanmax(np.abs(stretch(x, clip=False) - approximation)))
+    return error
+
+
+def _apply_lut(values, lut, slope):
+    values *= len(lut)
+    idx = np.clip(np.nan_to_num(values), 0, len(lut) - 1).astype(np.int32)
+    values -= idx  # fraction within the interval (NaN values remain NaN)
+    np.multiply(values, slope[idx], out=values)
+    values += lut[idx]
+    return values
+
+
+def _optional_kwargs(**kwargs):
+    # older astropy versions do not support all arguments
+    return {k: v for k, v in kwargs.items() if v is not None}
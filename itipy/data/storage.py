@@ -0,0 +1,342 @@
+import glob
+import json
+import logging
+import os
+import uuid
+from collections import deque
+from contextlib import closing, contextmanager
+from multiprocessing.pool import Pool
+
+import numpy as np
+from tqdm import tqdm
+
+
+class ShardedStore:
+    """
+    Sharded store of preprocessed samples for training.
+
+    The samples are appended to large memory-mapped shard files (``shard_<n>.bin``) and a compact index
+    (``index.json``) maps each sample id to (shard, offset, shape, dtype). Reads are zero-copy views of the shards,
+    such that patch editors (e.g., RandomPatchEditor, BrightestPixelPatchEditor) only read the selected region.
+    The store supports a single writer and any number of readers.
+
+    Args:
+        store_dir (str): Directory of the store.
+        dtype: Data type of the stored samples.
+        shard_size (int): Maximum size of a shard file in bytes.
+    """
+
+    ALIGNMENT = 64  # byte alignment of the samples
+
+    def __init__(self, store_dir, dtype=np.float32, shard_size=4 * 1024 ** 3):
+        self.store_dir = store_dir
+        self.dtype = np.dtype(dtype)
+        self.shard_size = shard_size
+        os.makedirs(store_dir, exist_ok=True)
+        self.index = self._loadIndex()
+        self._shard = max([entry[0] for entry in self.index.values()], default=0)  # current shard for writing
+        self._shards = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, id):
+        return id in self.index
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_shards'] = {}  # memory maps are reopened by each worker
+        return state
+
+    def get(self, id):
+        """
+        Load a sample from the store.
+
+        Args:
+            id (str): Id of the sample.
+
+        Returns:
+            np.ndarray: read-only memory-mapped view of the sample.
+        """
+        shard, offset, shape, dtype = self.index[id]
+        dtype = np.dtype(dtype)
+        n_bytes = int(np.prod(shape)) * dtype.itemsize
+        buffer = self._shards.get(shard)
+        if buffer is None or offset + n_bytes > buffer.shape[0]:  # shard was extended since it was opened
+            buffer = np.memmap(self._shardPath(shard), dtype=np.uint8, mode='r')
+            self._shards[shard] = buffer
+        return buffer[offset:offset + n_bytes].view(dtype).reshape(shape)
+
+    def put(self, id, data):
+        """
+        Append a sample to the store. The index is written with ``flush``.
+
+        Args:
+            id (str): Id of the sample.
+            data (np.ndarray): Sample.
+        """
+        data = np.ascontiguousarray(data, dtype=self.dtype)
+        shard = self._writableShard(data.nbytes)
+        with open(self._shardPath(shard), 'ab') as f:
+            offset = f.tell()
+            padding = -offset % self.ALIGNMENT
+            f.write(b'\0' * padding)
+            data.tofile(f)
+        self.index[id] = [shard, offset + padding, list(data.shape), data.dtype.str]
+
+    def flush(self):
+        """Write the index to disk."""
+        index_path = os.path.join(self.store_dir, 'index.json')
+        with atomic_write(index_path) as tmp_path, open(tmp_path, 'w') as f:  # atomic for concurrent readers
+            json.dump({'dtype': self.dtype.str, 'entries': self.index}, f)
+
+    def build(self, dataset, n_workers=4, flush_interval=100, retry_failed=False, max_in_flight=None,
+              convert_fn=None):
+        """
+        Convert all samples of the dataset that are not in the store (see convert_samples).
+
+        Failed samples are recorded in the failure manifest of the store (<store_dir>/failures.json) and skipped in
+        subsequent runs unless retry_failed is set.
+
+        Args:
+            dataset (BaseDataset): Dataset that provides the samples.
+            n_workers (int): Number of worker processes.
+            flush_interval (int): Number of samples after which the index and the manifest are written.
+            retry_failed (bool): Retry the samples of the failure manifest.
+            max_in_flight (int): Maximum number of pending samples (default: 2 * n_workers).
+            convert_fn (function): Picklable function that converts a dataset index to the sample or to a tuple
+                (sample, {key: array}); the additional arrays are stored as <id>:<key> (default: dataset.__getitem__).
+
+        Returns:
+            list: invalid data entries (e.g., files) of the dataset.
+        """
+        convert_fn = dataset.__getitem__ if convert_fn is None else convert_fn
+        return convert_samples(dataset, convert_fn, set(self.index), os.path.join(self.store_dir, 'failures.json'),
+                               write_fn=self._putResult, flush_fn=self.flush, n_workers=n_workers,
+                               retry_failed=retry_failed, max_in_flight=max_in_flight, flush_interval=flush_interval)
+
+    def _putResult(self, id, result):
+        data, entries = result if isinstance(result, tuple) else (result, {})
+        self.put(id, data)
+        for key, value in entries.items():
+            self.put('%s:%s' % (id, key), value)
+
+    def _loadIndex(self):
+        index_path = os.path.join(self.store_dir, 'index.json')
+        if not os.path.exists(index_path):
+            return {}
+        with open(index_path) as f:
+            index = json.load(f)
+        assert np.dtype(index['dtype']) == self.dtype, \
+            'Invalid dtype %s for store with dtype %s' % (self.dtype, index['dtype'])
+        return index['entries']
+
+    def _shardPath(self, shard):
+        return os.path.join(self.store_dir, 'shard_%05d.bin' % shard)
+
+    def _writableShard(self, n_bytes):
+        path = self._shardPath(self._shard)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size > 0 and size + n_bytes + self.ALIGNMENT > self.shard_size:
+            self._shard += 1
+        return self._shard
+
+
+def convert_npy_store(npy_dir, store_dir, **kwargs):
+    """
+    Convert a directory of per-sample .npy files (StorageDataset) to a sharded store.
+
+    Args:
+        npy_dir (str): Directory of the .npy files.
+        store_dir (str): Directory of the sharded store.
+        **kwargs: Additional arguments of the ShardedStore.
+
+    Returns:
+        ShardedStore: the sharded store.
+    """
+    store = ShardedStore(store_dir, **kwargs)
+    for i, path in enumerate(tqdm(sorted(glob.glob(os.path.join(npy_dir, '*.npy'))))):
+        id = os.path.basename(path)[:-len('.npy')]
+        if id in store:
+            continue
+        try:
+            store.put(id, np.load(path, mmap_mode='r'))
+        except Exception as ex:
+            logging.error('Unable to convert %s: %s' % (path, ex))
+        if (i + 1) % 100 == 0:
+            store.flush()
+    store.flush()
+    return store
+
+
+def convert_samples(dataset, convert_fn, converted_ids, manifest_path, write_fn=None, flush_fn=None, n_workers=4,
+                    retry_failed=False, max_in_flight=None, flush_interval=100):
+    """
+    Convert the samples of a dataset with a process pool (see parallel_map).
+
+    Samples with ids in converted_ids are skipped, such that an interrupted conversion resumes without redoing
+    completed samples. Failed samples are recorded with the reason in the failure manifest and skipped in subsequent
+    runs unless retry_failed is set.
+
+    Args:
+        dataset (BaseDataset): Dataset that provides the ids and data entries of the samples.
+        convert_fn (function): Picklable function that converts a dataset index (executed by the workers).
+        converted_ids (set): Ids of the converted samples.
+        manifest_path (str): Path of the failure manifest (.json).
+        write_fn (function): Function that stores the result of a sample in the main process (id, result).
+        flush_fn (function): Function that is called together with the manifest update (e.g., ShardedStore.flush).
+        n_workers (int): Number of worker processes.
+        retry_failed (bool): Retry the samples of the failure manifest.
+        max_in_flight (int): Maximum number of pending samples (default: 2 * n_workers).
+        flush_interval (int): Number of samples after which the manifest is written.
+
+    Returns:
+        list: invalid data entries (e.g., files) of the dataset.
+    """
+    failures = _load_failures(manifest_path)
+    ids = [dataset.getId(i) for i in range(len(dataset))]
+    indices = [i for i, id in enumerate(ids) if id not in converted_ids and (retry_failed or id not in failures)]
+    results = parallel_map(convert_fn, indices, n_workers, max_in_flight)
+    for i, (idx, result, error) in enumerate(tqdm(results, total=len(indices))):
+        if error is not None:
+            logging.error('Invalid data: %s' % dataset.data[idx])
+            logging.error(error)
+            failures[ids[idx]] = {'data': dataset.data[idx], 'reason': error}
+            continue
+        failures.pop(ids[idx], None)
+        if write_fn is not None:
+            write_fn(ids[idx], result)
+        if (i + 1) % flush_interval == 0:
+            _write_failures(manifest_path, failures, flush_fn)
+    _write_failures(manifest_path, failures, flush_fn)
+    return [f['data'] for f in failures.values()]
+
+
+def _load_failures(manifest_path):
+    if not os.path.exists(manifest_path):
+        return {}
+    with open(manifest_path) as f:
+        return json.load(f)
+
+
+def _write_failures(manifest_path, failures, flush_fn=None):
+    if flush_fn is not None:
+        flush_fn()
+    with atomic_write(manifest_path) as tmp_path, open(tmp_path, 'w') as f:
+        json.dump(failures, f, indent=2, default=str)
+
+
+@contextmanager
+def atomic_write(path):
+    """
+    Context manager for atomic file writes (e.g., for concurrent readers and interrupted writes).
+
+    The file is written to a unique temporary path, which replaces the file at the given path when the block
+    completes. If the block raises, the temporary file is removed and the existing file is not modified.
+
+    Args:
+        path (str): Path of the file.
+
+    Yields:
+        str: Temporary path to write to.
+    """
+    tmp_path = '%s.%s.tmp' % (path, uuid.uuid4().hex)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def parallel_map(fn, items, n_workers=4, max_in_flight=None, max_tasks_per_child=100, pool=None):
+    """
+    Apply a function to the items with a process pool.
+
+    The number of submitted tasks is bounded by max_in_flight, such that the memory of pending results is bounded.
+    Workers are restarted after max_tasks_per_child tasks to release leaked memory. Exceptions are returned instead of
+    raised.
+
+    Args:
+        fn (function): Picklable function (e.g., bound method of a dataset). It is sent once to each worker.
+        items (list): Arguments of the function.
+        n_workers (int): Number of worker processes (0 to run in the current process).
+        max_in_flight (int): Maximum number of submitted tasks (default: 2 * n_workers).
+        max_tasks_per_child (int): Number of tasks after which a worker is restarted (None to keep the workers).
+        pool (multiprocessing.pool.Pool): Pool of create_pool(fn, n_workers) that is used instead of a new pool
+            (e.g., started before other threads; the pool is not closed).
+
+    Returns:
+        generator: (item, result, error) in the order of the items.
+    """
+    if n_workers == 0:
+        for item in items:
+            yield _apply(fn, item)
+        return
+    max_in_flight = 2 * n_workers if max_in_flight is None else max_in_flight
+    if pool is not None:
+        yield from _map_async(pool, items, max_in_flight)
+        return
+    with closing(create_pool(fn, n_workers, max_tasks_per_child)) as pool:
+        yield from _map_async(pool, items, max_in_flight)
+
+
+def create_pool(fn, n_workers, max_tasks_per_child=100):
+    """
+    Create the process pool of parallel_map.
+
+    Workers are forked from the current process; pools of multithreaded processes (e.g., during inference) should be
+    created before the threads are started and with max_tasks_per_child=None, such that no workers are forked
+    while other threads hold locks (e.g., OpenMP).
+
+    Args:
+        fn (function): Picklable function. It is sent once to each worker.
+        n_workers (int): Number of worker processes.
+        max_tasks_per_child (int): Number of tasks after which a worker is restarted (None to keep the workers).
+
+    Returns:
+        multiprocessing.pool.Pool: the process pool.
+    """
+    return Pool(n_workers, initializer=_init_worker, initargs=(fn, n_workers), maxtasksperchild=max_tasks_per_child)
+
+
+def _map_async(pool, items, max_in_flight):
+    pending = deque()
+    for item in items:
+        pending.append(pool.apply_async(_call_worker, (item,)))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+_worker_fn = None
+_pool_size = 1  # number of worker processes of the parallel_map pool of the current process
+
+
+def get_pool_size():
+    """
+    Number of worker processes of the parallel_map pool that the current process belongs to (1 outside of a pool).
+    Used to limit the threads per worker (see itipy.data.editor.get_channel_executor).
+
+    Returns:
+        int: number of worker processes.
+    """
+    return _pool_size
+
+
+def _init_worker(fn, n_workers=1):
+    global _worker_fn, _pool_size
+    _worker_fn = fn
+    _pool_size = n_workers
+
+
+def _call_worker(item):
+    return _apply(_worker_fn, item)
+
+
+def _apply(fn, item):
+    try:
+        return item, fn(item), None
+    except Exception as ex:
+        return item, None, '%s: %s' % (type(ex).__name__, ex)
@@ -0,0 +1,141 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import numpy as np
+from astropy.io import fits
+
+try:
+    from sunpy.io._fits import header_to_fits
+except ImportError:  # sunpy < 5
+    from sunpy.io.fits import header_to_fits
+
+from itipy.data.storage import atomic_write
+
+
+class MapWriter:
+    """
+    Asynchronous writer for SunPy maps (FITS).
+
+    The maps are written by a thread or process pool, such that the translation is not blocked by the FITS
+    serialization. Files are written to a temporary file and renamed on completion (readers never see partial
+    files). The memory of the pending maps is bounded by max_in_flight; ``submit`` blocks when the budget is
+    exceeded.
+
+    Args:
+        n_workers (int): Number of writer threads or processes.
+        executor (str): 'thread' or 'process'.
+        compression (str): Tile compression (None, 'rice' or 'gzip').
+        dtype (str): Output data type (None to keep the data type, 'float32' or 'int16' quantized with BSCALE/BZERO).
+        quantize_level (float): Quantization level of the tile compression for floating point data (lossy; 0 for
+            lossless GZIP compression).
+        max_in_flight (int): Maximum size of the pending maps in bytes.
+    """
+
+    COMPRESSION_TYPES = {'rice': 'RICE_1', 'gzip': 'GZIP_2'}
+
+    def __init__(self, n_workers=4, executor='thread', compression=None, dtype=None, quantize_level=16.,
+                 max_in_flight=1024 ** 3):
+        assert executor in ['thread', 'process'], "Executor must be one of: ['thread', 'process']"
+        assert compression in [None, 'rice', 'gzip'], "Compression must be one of: [None, 'rice', 'gzip']"
+        assert dtype in [None, 'float32', 'int16'], "Data type must be one of: [None, 'float32', 'int16']"
+        self.compression = compression
+        self.dtype = dtype
+        self.quantize_level = quantize_level
+        self.max_in_flight = max_in_flight
+        self._executor = ThreadPoolExecutor(n_workers) if executor == 'thread' else ProcessPoolExecutor(n_workers)
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._errors = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def submit(self, s_map, path):
+        """
+        Write a map asynchronously.
+
+        Args:
+            s_map (sunpy.map.Map): SunPy Map object.
+            path (str): Path of the FITS file (existing files are replaced).
+        """
+        data, meta = np.asarray(s_map.data), dict(s_map.meta)
+        n_bytes = data.nbytes
+        with self._condition:
+            # wait for the budget (a single map larger than the budget is written alone)
+            self._condition.wait_for(lambda: self._in_flight == 0 or self._in_flight + n_bytes <= self.max_in_flight)
+            self._in_flight += n_bytes
+        future = self._executor.submit(write_fits, data, meta, path, compression=self.compression, dtype=self.dtype,
+                                       quantize_level=self.quantize_level)
+        future.add_done_callback(lambda f: self._done(f, n_bytes, path))
+
+    def write(self, maps, paths):
+        """
+        Write multiple maps asynchronously.
+
+        Args:
+            maps (list): SunPy maps.
+            paths (list): Paths of the FITS files.
+        """
+        for s_map, path in zip(maps, paths):
+            self.submit(s_map, path)
+
+    def close(self):
+        """Wait for the pending maps and raise the first error."""
+        self._executor.shutdown(wait=True)
+        if len(self._errors) > 0:
+            raise self._errors[0]
+
+    def _done(self, future, n_bytes, path):
+        with self._condition:
+            self._in_flight -= n_bytes
+            self._condition.notify_all()
+        if future.exception() is not None:
+            logging.error('Unable to write %s: %s' % (path, future.exception()))
+            self._errors.append(future.exception())
+
+
+def write_fits(data, meta, path, compression=None, dtype=None, quantize_level=16.):
+    """
+    Write data and metadata to a FITS file (atomic rename on completion).
+
+    Args:
+        data (np.ndarray): Image data.
+        meta (dict): Map metadata.
+        path (str): Path of the FITS file.
+        compression (str): Tile compression (None, 'rice' or 'gzip').
+        dtype (str): Output data type (None, 'float32' or 'int16').
+        quantize_level (float): Quantization level of the tile compression for floating point data.
+    """
+    header = header_to_fits(meta)
+    for key in ['BSCALE', 'BZERO', 'BLANK']:
+        header.remove(key, ignore_missing=True)
+    if dtype == 'float32' or dtype == 'int16':
+        data = data.astype(np.float32)
+    if compression is None:
+        hdu = fits.PrimaryHDU(data, header)
+        hdul = fits.HDUList([hdu])
+    else:
+        hdu = fits.CompImageHDU(data, header, compression_type=MapWriter.COMPRESSION_TYPES[compression],
+                                quantize_level=quantize_level)
+        hdul = fits.HDUList([fits.PrimaryHDU(), hdu])
+    if dtype == 'int16':
+        _quantize(hdu, data)
+    with atomic_write(path) as tmp_path:
+        hdul.writeto(tmp_path, output_verify='silentfix')
+
+
+def _quantize(hdu, data):
+    # linear int16 quantization of the finite values; NaN values are stored as BLANK
+    finite = np.isfinite(data)
+    v_min, v_max = (data[finite].min(), data[finite].max()) if finite.any() else (0., 0.)
+    bscale = (v_max - v_min) / 65532 if v_max > v_min else 1.
+    bzero = (v_max + v_min) / 2
+    blank = -32768
+    if not finite.all():
+        hdu.data = np.where(finite, data, bzero + blank * bscale).astype(np.float32)
+    hdu.scale('int16', bscale=bscale, bzero=bzero)
+    hdu.header['BLANK'] = blank
@@ -0,0 +1,48 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+import torch
+
+from itipy.translate import InstrumentToInstrument, BATCH_TOLERANCE
+
+parser = argparse.ArgumentParser(description='Benchmark the throughput of batched ITI inference on the CPU.')
+parser.add_argument('--model_path', type=str, help='Path to the generator model file.')
+parser.add_argument('--channels', type=int, default=5, help='Number of input channels.')
+parser.add_argument('--resolution', type=int, default=1024, help='Resolution of the (padded) input images.')
+parser.add_argument('--n_images', type=int, default=16, help='Number of images per run.')
+parser.add_argument('--batch_sizes', type=int, nargs='+', default=[1, 2, 4, 8], help='Batch sizes to evaluate.')
+parser.add_argument('--n_threads', type=int, default=None, help='Number of torch threads.')
+parser.add_argument('--tolerance', type=float, default=BATCH_TOLERANCE,
+                    help='Maximum accepted absolute difference from per-image inference.')
+
+args = parser.parse_args()
+
+if args.n_threads is not None:
+    torch.set_num_threads(args.n_threads)
+
+translator = InstrumentToInstrument(model_path=args.model_path, device=torch.device('cpu'))
+images = np.random.uniform(-1, 1, (args.n_images, args.channels, args.resolution, args.resolution)).astype(np.float32)
+
+# warm-up
+translator._inferBatch(images[:1])
+
+# per-image reference
+start = time.time()
+reference = np.concatenate([translator._inferBatch(images[i:i + 1]) for i in range(len(images))])
+print('per-image: %.2f s' % (time.time() - start))
+
+failed = False
+print('%10s %12s %12s %15s %10s' % ('batch_size', 'time [s]', 'images/s', 'max abs diff', 'accepted'))
+for batch_size in args.batch_sizes:
+    start = time.time()
+    outputs = np.concatenate([translator._inferBatch(images[i:i + batch_size])
+                              for i in range(0, len(images), batch_size)])
+    duration = time.time() - start
+    diff = np.abs(outputs - reference).max()
+    accepted = diff <= args.tolerance
+    failed |= not accepted
+    print('%10d %12.2f %12.2f %15.3e %10s' % (batch_size, duration, len(images) / duration, diff, accepted))
+if failed:
+    sys.exit('Batched inference deviates from per-image inference by more than %.1e' % args.tolerance)
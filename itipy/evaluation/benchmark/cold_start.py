@@ -0,0 +1,61 @@
+import argparse
+import json
+import subprocess
+import sys
+
+parser = argparse.ArgumentParser(description='Benchmark the cold-start-to-first-image time of pickled generators '
+                                             'and compiled artifacts (itipy/artifact.py). Each run uses a new '
+                                             'Python process.')
+parser.add_argument('--model_paths', type=str, nargs='+',
+                    help='Paths to pickled generators (.pt), TorchScript artifacts or ONNX artifacts (.onnx).')
+parser.add_argument('--channels', type=int, default=1, help='Number of input channels.')
+parser.add_argument('--resolution', type=int, default=1024, help='Resolution of the (padded) input image.')
+parser.add_argument('--n_runs', type=int, default=3, help='Number of runs per model.')
+parser.add_argument('--runtime_only', action='store_true',
+                    help='Load the artifacts with itipy.artifact instead of InstrumentToInstrument '
+                         '(no import of the data and translation stack).')
+
+args = parser.parse_args()
+
+# executed in a new process; the timings are printed as JSON
+translator_script = '''
+import time
+start = time.time()
+import numpy as np
+import torch
+from itipy.translate import InstrumentToInstrument
+t_import = time.time()
+translator = InstrumentToInstrument(model_path=%(path)r, device=torch.device('cpu'))
+t_load = time.time()
+translator._inferBatch(np.random.uniform(-1, 1, (1, %(channels)d, %(resolution)d, %(resolution)d)).astype(np.float32))
+t_first = time.time()
+print({'import': t_import - start, 'load': t_load - t_import, 'first_image': t_first - t_load,
+       'total': t_first - start})
+'''
+
+runtime_script = '''
+import time
+start = time.time()
+import torch
+from itipy.artifact import load_artifact
+t_import = time.time()
+generator, info = load_artifact(%(path)r)
+t_load = time.time()
+with torch.no_grad():
+    generator(torch.rand(1, %(channels)d, %(resolution)d, %(resolution)d) * 2 - 1)
+t_first = time.time()
+print({'import': t_import - start, 'load': t_load - t_import, 'first_image': t_first - t_load,
+       'total': t_first - start})
+'''
+
+script = runtime_script if args.runtime_only else translator_script
+print('%-40s %10s %10s %14s %10s' % ('model', 'import [s]', 'load [s]', 'first img [s]', 'total [s]'))
+for path in args.model_paths:
+    code = script % {'path': path, 'channels': args.channels, 'resolution': args.resolution}
+    runs = []
+    for _ in range(args.n_runs):
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1].replace("'", '"')))
+    median = {key: sorted(run[key] for run in runs)[len(runs) // 2] for key in runs[0]}
+    print('%-40s %10.2f %10.2f %14.2f %10.2f' % (path[-40:], median['import'], median['load'],
+                                                   median['first_image'], median['total']))
@@ -0,0 +1,52 @@
+import argparse
+import glob
+import os
+import time
+import tracemalloc
+
+import numpy as np
+from sunpy.map import Map
+
+from itipy.data.editor import LoadMapEditor, NormalizeRadiusEditor, sdo_norms
+
+parser = argparse.ArgumentParser(description='Accuracy report of the downsample-first resampling of the '
+                                             'NormalizeRadiusEditor compared to the full-size interpolation.')
+parser.add_argument('--data_path', type=str, help='Path to a directory with AIA FITS files (e.g., 4096x4096 level 1).')
+parser.add_argument('--wavelength', type=int, default=171, help='Wavelength of the AIA files (for normalization).')
+parser.add_argument('--resolutions', type=int, nargs='+', default=[2048, 1024, 512], help='Target resolutions.')
+parser.add_argument('--engine', type=str, default='sunpy', help='Resampling engine (sunpy or affine).')
+parser.add_argument('--n_files', type=int, default=5, help='Number of files to evaluate.')
+
+args = parser.parse_args()
+
+files = sorted(glob.glob(os.path.join(args.data_path, '**', '*.fits'), recursive=True))[:args.n_files]
+norm = sdo_norms[args.wavelength]
+maps = [LoadMapEditor().call(f)[0] for f in files]
+
+
+def run(editor, s_map):
+    tracemalloc.start()
+    start = time.time()
+    result = editor.call(Map(s_map.data, s_map.meta.copy()))
+    duration = time.time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, duration, peak / 1024 ** 2
+
+
+print('%10s %10s %10s %10s %10s %12s %12s %12s' % ('resolution', 'full [s]', 'first [s]', 'full [MB]',
+                                                    'first [MB]', 'max diff', 'mean diff', 'total flux'))
+for resolution in args.resolutions:
+    full_editor = NormalizeRadiusEditor(resolution, engine=args.engine, downsample_first=False)
+    first_editor = NormalizeRadiusEditor(resolution, engine=args.engine, downsample_first=True)
+    stats = []
+    for s_map in maps:
+        full_map, full_time, full_mem = run(full_editor, s_map)
+        first_map, first_time, first_mem = run(first_editor, s_map)
+        # compare in the normalized range [-1, 1] that is used for training
+        diff = np.abs((norm(full_map.data).data - norm(first_map.data).data) * 2)
+        flux = np.abs(first_map.data.sum() / full_map.data.sum() - 1)  # relative deviation of the total intensity
+        stats.append((full_time, first_time, full_mem, first_mem, diff.max(), diff.mean(), flux))
+    stats = np.array(stats)
+    print('%10d %10.2f %10.2f %10.0f %10.0f %12.3e %12.3e %12.3e' % (
+        resolution, *stats[:, :4].mean(0), stats[:, 4].max(), stats[:, 5].mean(), stats[:, 6].max()))
@@ -0,0 +1,60 @@
+import argparse
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from itipy.data.editor import NanEditor, NormalizeEditor, ReshapeEditor, sdo_norms, fuse_editors, FUSION_TOLERANCE
+
+parser = argparse.ArgumentParser(description='Allocation and timing report of the fused array editors '
+                                             '(NanEditor, NormalizeEditor, ReshapeEditor) for SDO stacks.')
+parser.add_argument('--resolution', type=int, default=2048, help='Resolution of the channels.')
+parser.add_argument('--wavelengths', type=str, nargs='+', default=['171', '193', '211', '304', 'mag'],
+                    help='Channels of the stack.')
+parser.add_argument('--n_samples', type=int, default=5, help='Number of samples per run.')
+parser.add_argument('--tolerance', type=float, default=FUSION_TOLERANCE,
+                    help='Maximum accepted absolute difference between fused and unfused editors.')
+
+args = parser.parse_args()
+wavelengths = [int(wl) if wl.isdigit() else wl for wl in args.wavelengths]
+
+# stage after MapToDataEditor (float32 map data with off-disk NaNs)
+channels = []
+for wl in wavelengths:
+    norm = sdo_norms[wl]
+    data = np.random.uniform(norm.vmin, norm.vmax, (args.resolution, args.resolution)).astype(np.float32)
+    data[:args.resolution // 10] = np.nan
+    channels.append(data)
+pipelines = [[NanEditor(), NormalizeEditor(sdo_norms[wl]), ReshapeEditor((1, args.resolution, args.resolution))]
+             for wl in wavelengths]
+
+
+def run(pipelines):
+    tracemalloc.start()
+    start = time.time()
+    for _ in range(args.n_samples):
+        stack = []
+        for data, editors in zip(channels, pipelines):
+            kwargs = {}
+            for editor in editors:
+                data, kwargs = editor.convert(data, **kwargs)
+            stack.append(data)
+        stack = np.concatenate(stack, 0)
+    duration = (time.time() - start) / args.n_samples
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return stack, duration, peak / 1024 ** 2
+
+
+reference, reference_time, reference_peak = run(pipelines)
+fused, fused_time, fused_peak = run([fuse_editors(editors) for editors in pipelines])
+stack_size = reference.nbytes / 1024 ** 2
+
+print('%10s %14s %14s %14s' % ('pipeline', 'time/sample [s]', 'peak [MB]', 'peak / stack'))
+print('%10s %14.3f %14.0f %14.1f' % ('editors', reference_time, reference_peak, reference_peak / stack_size))
+print('%10s %14.3f %14.0f %14.1f' % ('fused', fused_time, fused_peak, fused_peak / stack_size))
+max_diff = np.abs(reference - fused).max()
+print('speed-up %.1fx; max abs diff %.3e (tolerance %.1e)' % (reference_time / fused_time, max_diff, args.tolerance))
+if max_diff > args.tolerance:
+    sys.exit('Fused editors deviate from the unfused editors by more than %.1e' % args.tolerance)
@@ -0,0 +1,47 @@
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+
+from itipy.data.editor import LoadMapEditor, LazyLoadMapEditor, MapToDataEditor
+
+parser = argparse.ArgumentParser(description='Compare the per-file load latency of the LazyLoadMapEditor with the '
+                                             'LoadMapEditor (e.g., for compressed AIA/HMI files).')
+parser.add_argument('--data_path', type=str, help='Path to a directory with FITS files.')
+parser.add_argument('--n_files', type=int, default=20, help='Number of files to evaluate.')
+parser.add_argument('--n_repeats', type=int, default=2, help='Number of passes (header cache after the first pass).')
+
+args = parser.parse_args()
+
+files = sorted(glob.glob(os.path.join(args.data_path, '**', '*.fits'), recursive=True))[:args.n_files]
+
+
+def run(load_editor, access):
+    durations = []
+    for f in files:
+        start = time.time()
+        s_map, _ = load_editor.call(f)
+        access(s_map)
+        durations.append(time.time() - start)
+    return np.mean(durations)
+
+
+accesses = {'data': lambda s_map: MapToDataEditor().call(s_map)[0].sum(),  # data and header only
+            'wcs': lambda s_map: s_map.scale}  # construct the Map
+print('%8s %8s %14s %14s %10s' % ('access', 'pass', 'Map [ms]', 'lazy [ms]', 'speed-up'))
+for access_name, access in accesses.items():
+    for i in range(args.n_repeats):
+        reference = run(LoadMapEditor(), access)
+        lazy = run(LazyLoadMapEditor(), access)
+        print('%8s %8d %14.1f %14.1f %10.1f' % (access_name, i, reference * 1e3, lazy * 1e3, reference / lazy))
+
+# consistency of the loaded data and metadata
+for f in files:
+    s_map, _ = LoadMapEditor().call(f)
+    lazy_map, _ = LazyLoadMapEditor().call(f)
+    assert np.array_equal(s_map.data, lazy_map.data, equal_nan=True), 'Data mismatch: %s' % f
+    assert s_map.date == lazy_map.date and s_map.reference_pixel == lazy_map.reference_pixel, \
+        'Header mismatch: %s' % f
+print('Data and WCS of %d files are identical.' % len(files))
@@ -0,0 +1,53 @@
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+from sunpy.map import Map
+
+from itipy.data.editor import LoadMapEditor, KSOPrepEditor, NormalizeRadiusEditor, LimbDarkeningCorrectionEditor
+
+parser = argparse.ArgumentParser(description='Compare the radially-binned limb darkening fit with the fit over all '
+                                             'on-disk pixels (KSO flat data).')
+parser.add_argument('--data_path', type=str, help='Path to a directory with KSO FITS files.')
+parser.add_argument('--resolution', type=int, default=1024, help='Resolution of the normalized maps.')
+parser.add_argument('--n_bins', type=int, nargs='+', default=[100, 200, 400], help='Number of radial bins.')
+parser.add_argument('--statistic', type=str, default='median', help='Statistic of the radial bins (median or mean).')
+parser.add_argument('--n_files', type=int, default=5, help='Number of files to evaluate.')
+
+args = parser.parse_args()
+
+files = sorted(glob.glob(os.path.join(args.data_path, '**', '*.fts.gz'), recursive=True))[:args.n_files]
+prep_editors = [LoadMapEditor(), KSOPrepEditor(), NormalizeRadiusEditor(args.resolution, 0)]
+maps = []
+for f in files:
+    data, kwargs = f, {}
+    for editor in prep_editors:
+        data, kwargs = editor.convert(data, **kwargs)
+    maps.append(data)
+
+
+def run(editor, s_map):
+    start = time.time()
+    result = editor.call(Map(s_map.data, s_map.meta))
+    return result.data, time.time() - start
+
+
+reference_editor = LimbDarkeningCorrectionEditor()
+reference = [run(reference_editor, s_map) for s_map in maps]
+reference_time = np.mean([t for _, t in reference])
+
+print('%8s %12s %10s %12s %12s' % ('n_bins', 'time [s]', 'speed-up', 'max diff', 'mean diff'))
+print('%8s %12.3f %10.1f %12s %12s' % ('pixels', reference_time, 1, '-', '-'))
+for n_bins in args.n_bins:
+    editor = LimbDarkeningCorrectionEditor(n_bins=n_bins, statistic=args.statistic)
+    run(editor, maps[0])  # build the radial bins
+    stats = []
+    for s_map, (ref_data, _) in zip(maps, reference):
+        data, duration = run(editor, s_map)
+        diff = np.abs(data - ref_data)
+        stats.append((duration, np.nanmax(diff), np.nanmean(diff)))
+    stats = np.array(stats)
+    print('%8d %12.3f %10.1f %12.3e %12.3e' % (n_bins, stats[:, 0].mean(), reference_time / stats[:, 0].mean(),
+                                               stats[:, 1].max(), stats[:, 2].mean()))
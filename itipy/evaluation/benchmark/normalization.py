@@ -0,0 +1,50 @@
+import argparse
+import time
+
+import numpy as np
+from astropy.visualization import ImageNormalize
+
+from itipy.data.editor import sdo_norms, soho_norms, stereo_norms
+from itipy.data.norm import CompiledNormalize
+
+parser = argparse.ArgumentParser(description='Compare the compiled normalization (exact and lookup table) '
+                                             'with astropy ImageNormalize.')
+parser.add_argument('--resolution', type=int, default=2048, help='Resolution of the test images.')
+parser.add_argument('--lut_error', type=float, default=1e-4, help='Maximum error of the lookup tables.')
+parser.add_argument('--n_repeats', type=int, default=5, help='Number of repetitions for the timing.')
+
+args = parser.parse_args()
+
+
+def timeit(f, *a):
+    start = time.time()
+    for _ in range(args.n_repeats):
+        result = f(*a)
+    return result, (time.time() - start) / args.n_repeats
+
+
+tables = {'sdo': sdo_norms, 'soho': soho_norms, 'stereo': stereo_norms}
+print('%16s %8s %12s %12s %12s %12s %12s' % ('norm', 'mode', 'forward [s]', 'inverse [s]', 'speed-up',
+                                             'forward err', 'inverse err'))
+for table_name, table in tables.items():
+    for key, norm in table.items():
+        reference = ImageNormalize(vmin=norm.vmin, vmax=norm.vmax, stretch=norm.stretch, clip=True)
+        # include values outside of the normalization range
+        data = np.random.uniform(norm.vmin - 0.1 * (norm.vmax - norm.vmin), norm.vmax * 1.1,
+                                 (args.resolution, args.resolution)).astype(np.float32)
+        normalized = np.random.uniform(0, 1, (args.resolution, args.resolution)).astype(np.float32)
+        ref_forward, ref_forward_time = timeit(lambda d: reference(d).data, data)
+        ref_inverse, ref_inverse_time = timeit(reference.inverse, normalized)
+        for mode, lut_error in [('exact', None), ('lut', args.lut_error)]:
+            compiled = CompiledNormalize(vmin=norm.vmin, vmax=norm.vmax, stretch=norm.stretch, clip=True,
+                                         lut_error=lut_error)
+            compiled(data[:1])  # build the lookup tables
+            compiled.inverse(normalized[:1])
+            forward, forward_time = timeit(lambda d: compiled(d).data, data)
+            inverse, inverse_time = timeit(compiled.inverse, normalized)
+            # inverse error relative to the data range
+            inverse_error = np.abs(inverse - ref_inverse).max() / (norm.vmax - norm.vmin)
+            print('%16s %8s %12.3f %12.3f %12.1f %12.3e %12.3e' % (
+                '%s %s' % (table_name, key), mode, forward_time, inverse_time,
+                (ref_forward_time + ref_inverse_time) / (forward_time + inverse_time),
+                np.abs(forward - ref_forward).max(), inverse_error))
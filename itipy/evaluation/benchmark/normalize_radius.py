@@ -0,0 +1,53 @@
+import argparse
+import glob
+import os
+import time
+
+import astropy.units as u
+import numpy as np
+from astropy.coordinates import SkyCoord
+from sunpy.map import Map
+
+from itipy.data.editor import LoadMapEditor, NormalizeRadiusEditor, sdo_norms
+
+parser = argparse.ArgumentParser(description='Compare the affine and sunpy engines of the NormalizeRadiusEditor.')
+parser.add_argument('--data_path', type=str, help='Path to a directory with AIA FITS files (e.g., 4096x4096 level 1).')
+parser.add_argument('--wavelength', type=int, default=171, help='Wavelength of the AIA files (for normalization).')
+parser.add_argument('--resolutions', type=int, nargs='+', default=[4096, 2048, 1024, 512],
+                    help='Target resolutions to evaluate.')
+parser.add_argument('--n_files', type=int, default=5, help='Number of files to evaluate.')
+
+args = parser.parse_args()
+
+files = sorted(glob.glob(os.path.join(args.data_path, '**', '*.fits'), recursive=True))[:args.n_files]
+norm = sdo_norms[args.wavelength]
+maps = [LoadMapEditor().call(f)[0] for f in files]
+
+print('%10s %12s %12s %10s %12s %12s %12s' % ('resolution', 'sunpy [s]', 'affine [s]', 'speed-up',
+                                               'max diff', 'mean diff', 'center diff'))
+for resolution in args.resolutions:
+    sunpy_editor = NormalizeRadiusEditor(resolution, engine='sunpy')
+    affine_editor = NormalizeRadiusEditor(resolution, engine='affine')
+    sunpy_time, affine_time, max_diffs, mean_diffs, center_diffs = 0, 0, [], [], []
+    for s_map in maps:
+        start = time.time()
+        sunpy_map = sunpy_editor.call(Map(s_map.data, s_map.meta.copy()))
+        sunpy_time += time.time() - start
+        start = time.time()
+        affine_map = affine_editor.call(Map(s_map.data, s_map.meta.copy()))
+        affine_time += time.time() - start
+        # compare in the normalized range [-1, 1] that is used for training
+        sunpy_img = norm(sunpy_map.data).data * 2 - 1
+        affine_img = norm(affine_map.data).data * 2 - 1
+        diff = np.abs(sunpy_img - affine_img)
+        max_diffs.append(diff.max())
+        mean_diffs.append(diff.mean())
+        # position of the disk center in both frames (WCS consistency)
+        centers = [np.array([c.value for c in m.world_to_pixel(SkyCoord(0 * u.arcsec, 0 * u.arcsec,
+                                                                        frame=m.coordinate_frame))])
+                   for m in [sunpy_map, affine_map]]
+        center_diffs.append(np.abs(centers[0] - centers[1]).max())
+    n = len(maps)
+    print('%10d %12.2f %12.2f %10.1f %12.3e %12.3e %12.3f' % (resolution, sunpy_time / n, affine_time / n,
+                                                               sunpy_time / affine_time, np.max(max_diffs),
+                                                               np.mean(mean_diffs), np.max(center_diffs)))
@@ -0,0 +1,83 @@
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+import torch
+
+from itipy.evaluation.metrics import mae, psnr, image_correlation
+from itipy.translate import InstrumentToInstrument
+
+SHIPPED_MODELS = ['soho_to_sdo_v0_2.pt', 'soho_to_sdo_euv_v0_1.pt', 'stereo_to_sdo_v0_2.pt',
+                  'stereo_to_sdo_mag_v0_2.pt', 'kso_low_to_high_v0_2.pt', 'kso_film_to_ccd_v0_1.pt',
+                  'hmi_to_hinode_v0_2.pt', 'swap_to_aia_v0_2.pt', 'fsi_to_aia_v0_3.pt', 'aia_to_hri_v0_1.pt']
+
+parser = argparse.ArgumentParser(description='Compare reduced-precision CPU inference (bfloat16 autocast, '
+                                             'channels_last) with float32 inference for the shipped models.')
+parser.add_argument('--models', type=str, nargs='+', default=SHIPPED_MODELS,
+                    help='Model names (downloaded to ~/.iti) or paths to model files.')
+parser.add_argument('--data_dir', type=str, default=None,
+                    help='Directory with reference sets <model name>.npy '
+                         '(preprocessed and padded samples [n, channel, height, width]). '
+                         'Models without reference set are timed on random data without accuracy verdict.')
+parser.add_argument('--resolution', type=int, default=512, help='Resolution of the input images (random data).')
+parser.add_argument('--n_samples', type=int, default=4, help='Number of samples (random data).')
+parser.add_argument('--n_threads', type=int, default=None, help='Number of torch threads.')
+parser.add_argument('--min_psnr', type=float, default=40., help='Minimum accepted PSNR [dB] (data range 2).')
+parser.add_argument('--min_correlation', type=float, default=0.999, help='Minimum accepted image correlation.')
+
+args = parser.parse_args()
+
+if args.n_threads is not None:
+    torch.set_num_threads(args.n_threads)
+
+
+def load_translator(model, **kwargs):
+    if os.path.exists(model):
+        return InstrumentToInstrument(model_path=model, device=torch.device('cpu'), **kwargs)
+    return InstrumentToInstrument(model_name=model, device=torch.device('cpu'), **kwargs)
+
+
+def load_reference_set(model, translator):
+    name = os.path.basename(model).replace('.pt', '')
+    paths = glob.glob(os.path.join(args.data_dir, name + '.npy')) if args.data_dir is not None else []
+    if len(paths) > 0:
+        return np.load(paths[0]).astype(np.float32), 'reference'
+    # number of input channels from the first convolution
+    n_channels = next(p for p in translator.generator.parameters() if p.dim() == 4).shape[1]
+    shape = (args.n_samples, n_channels, args.resolution, args.resolution)
+    return np.random.uniform(-1, 1, shape).astype(np.float32), 'random'
+
+
+def run(translator, images):
+    translator._inferBatch(images[:1])  # warm-up
+    start = time.time()
+    outputs = np.concatenate([translator._inferBatch(images[i:i + 1]) for i in range(len(images))])
+    return outputs, time.time() - start
+
+
+configurations = [('bfloat16', False), ('float32', True), ('bfloat16', True)]
+print('%-28s %-9s %-10s %-13s %8s %10s %10s %12s %10s' %
+      ('model', 'data', 'precision', 'channels_last', 'speedup', 'MAE', 'PSNR [dB]', 'correlation', 'accepted'))
+for model in args.models:
+    translator = load_translator(model)
+    images, source = load_reference_set(model, translator)
+    reference, reference_duration = run(translator, images)
+    print('%-28s %-9s %-10s %-13s %8.2f %10s %10s %12s %10s' %
+          (os.path.basename(model), source, 'float32', False, 1, '-', '-', '-', '-'))
+    for precision, channels_last in configurations:
+        translator = load_translator(model, precision=precision, channels_last=channels_last)
+        outputs, duration = run(translator, images)
+        # outputs are in [-1, 1]
+        model_mae = np.mean(mae(outputs, reference))
+        model_psnr = np.mean(psnr(outputs, reference, data_range=2.0))
+        model_cc = np.mean(image_correlation(outputs, reference))
+        # the accuracy on random inputs is not representative of observations
+        accepted = model_psnr >= args.min_psnr and model_cc >= args.min_correlation if source == 'reference' \
+            else 'n/a'
+        print('%-28s %-9s %-10s %-13s %8.2f %10.3e %10.2f %12.6f %10s' %
+              (os.path.basename(model), source, precision, channels_last, reference_duration / duration,
+               model_mae, model_psnr, model_cc, accepted))
+if args.data_dir is None:
+    print('No reference sets (--data_dir): the precision of the models was not verified.')
@@ -0,0 +1,52 @@
+import argparse
+import glob
+import os
+import time
+
+import numpy as np
+import torch
+
+from itipy.evaluation.metrics import psnr, ssim
+from itipy.translate import InstrumentToInstrument
+
+parser = argparse.ArgumentParser(description='Compare int8 quantized inference with float32 inference '
+                                             '(speedup and PSNR/SSIM drift per channel).')
+parser.add_argument('--model_path', type=str, help='Path to the float generator.')
+parser.add_argument('--quantized_path', type=str, help='Path to the quantized artifact (itipy/quantization.py).')
+parser.add_argument('--store_dir', type=str,
+                    help='Storage directory of the StorageDataset of the input instrument (.npy samples).')
+parser.add_argument('--n_samples', type=int, default=16, help='Number of evaluation samples.')
+parser.add_argument('--n_threads', type=int, default=None, help='Number of torch threads.')
+
+args = parser.parse_args()
+
+if args.n_threads is not None:
+    torch.set_num_threads(args.n_threads)
+
+files = sorted(glob.glob(os.path.join(args.store_dir, '*.npy')))
+# evaluate on the last samples (calibration uses a random selection of all samples)
+images = [np.load(f).astype(np.float32) for f in files[-args.n_samples:]]
+
+translator = InstrumentToInstrument(model_path=args.model_path, device=torch.device('cpu'))
+quantized_translator = InstrumentToInstrument(model_path=args.quantized_path)
+assert quantized_translator.quantized, 'Not a quantized artifact: %s' % args.quantized_path
+
+
+def run(translator):
+    translator._inferBatch(images[0][None])  # warm-up
+    start = time.time()
+    outputs = np.stack([translator._inferBatch(img[None])[0] for img in images])
+    return outputs, time.time() - start
+
+
+reference, reference_duration = run(translator)
+outputs, duration = run(quantized_translator)
+print('float32: %.2f s, int8: %.2f s, speedup: %.2f' % (reference_duration, duration, reference_duration / duration))
+
+# outputs are in [-1, 1]
+print('%8s %12s %12s %12s' % ('channel', 'PSNR [dB]', 'SSIM', 'max diff'))
+for c in range(reference.shape[1]):
+    channel_psnr = np.mean(psnr(outputs[:, c], reference[:, c], data_range=2.0))
+    channel_ssim = np.mean([ssim(o, r, data_range=2.0) for o, r in zip(outputs[:, c], reference[:, c])])
+    print('%8d %12.2f %12.4f %12.3e' % (c, channel_psnr, channel_ssim,
+                                         np.abs(outputs[:, c] - reference[:, c]).max()))
@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from itipy.translate import TILE_TOLERANCE
+
+parser = argparse.ArgumentParser(description='Compare overlapping-tile inference with full-frame inference. '
+                                             'Each mode runs in a separate process, such that the peak memory '
+                                             '(maximum RSS) is measured independently.')
+parser.add_argument('--model_path', type=str, help='Path to the generator model file.')
+parser.add_argument('--data_path', type=str, default=None,
+                    help='Optional path to a preprocessed sample (.npy, [channel, height, width]). '
+                         'Random data is used if not provided.')
+parser.add_argument('--channels', type=int, default=1, help='Number of input channels (random data).')
+parser.add_argument('--resolution', type=int, default=2048, help='Resolution of the input image (random data).')
+parser.add_argument('--tile_size', type=int, default=512, help='Size of the tiles.')
+parser.add_argument('--overlaps', type=int, nargs='+', default=[0, 64, 128, 256], help='Tile overlaps to evaluate.')
+parser.add_argument('--tile_window', type=str, default='hann', help='Blending window (hann or linear).')
+parser.add_argument('--tolerance', type=float, default=TILE_TOLERANCE,
+                    help='Maximum accepted mean absolute deviation from full-frame inference.')
+parser.add_argument('--skip_full_frame', action='store_true', help='Skip the full-frame reference (large images).')
+# internal: run a single mode in the current process
+parser.add_argument('--worker', type=str, default=None, help=argparse.SUPPRESS)
+parser.add_argument('--overlap', type=int, default=None, help=argparse.SUPPRESS)
+parser.add_argument('--input_path', type=str, default=None, help=argparse.SUPPRESS)
+parser.add_argument('--output_path', type=str, default=None, help=argparse.SUPPRESS)
+
+args = parser.parse_args()
+
+
+def max_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # MB (linux)
+
+
+def run_worker():
+    import torch
+    from itipy.translate import InstrumentToInstrument
+
+    img = np.load(args.input_path)
+    translator = InstrumentToInstrument(model_path=args.model_path, device=torch.device('cpu'),
+                                        tile_window=args.tile_window)
+    rss_before = max_rss()
+    if args.worker == 'tiled':
+        translator.tile_size = args.tile_size
+        translator.tile_overlap = args.overlap
+    start = time.time()
+    iti_img = translator._inferBatch(img[None])[0]
+    duration = time.time() - start
+    np.save(args.output_path, iti_img)
+    print(json.dumps({'time': duration, 'rss_before': rss_before, 'max_rss': max_rss()}))
+
+
+def run_mode(mode, input_path, output_path, overlap=None):
+    command = [sys.executable, os.path.abspath(__file__), '--model_path', args.model_path, '--worker', mode,
+               '--tile_size', str(args.tile_size), '--tile_window', args.tile_window,
+               '--input_path', input_path, '--output_path', output_path]
+    if overlap is not None:
+        command += ['--overlap', str(overlap)]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+if args.worker is not None:
+    run_worker()
+    sys.exit()
+
+if args.data_path is not None:
+    img = np.load(args.data_path).astype(np.float32)
+else:
+    img = np.random.uniform(-1, 1, (args.channels, args.resolution, args.resolution)).astype(np.float32)
+
+with tempfile.TemporaryDirectory() as tmp_dir:
+    input_path = os.path.join(tmp_dir, 'input.npy')
+    np.save(input_path, img)
+    reference = None
+    if not args.skip_full_frame:
+        reference_path = os.path.join(tmp_dir, 'full_frame.npy')
+        stats = run_mode('full_frame', input_path, reference_path)
+        reference = np.load(reference_path)
+        print('full-frame: %.2f s (peak RSS %.0f MB, %.0f MB after loading)' %
+              (stats['time'], stats['max_rss'], stats['rss_before']))
+
+    print('%8s %10s %14s %12s %12s %10s' % ('overlap', 'time [s]', 'peak RSS [MB]', 'max diff', 'mean diff',
+                                            'accepted'))
+    failed = False
+    for overlap in args.overlaps:
+        output_path = os.path.join(tmp_dir, 'tiled_%d.npy' % overlap)
+        stats = run_mode('tiled', input_path, output_path, overlap)
+        if reference is None:
+            print('%8d %10.2f %14.0f %12s %12s %10s' % (overlap, stats['time'], stats['max_rss'], '-', '-', '-'))
+            continue
+        diff = np.abs(np.load(output_path) - reference)
+        accepted = diff.mean() <= args.tolerance
+        failed |= overlap >= 128 and not accepted  # the tolerance applies to overlaps >= 128 pixels
+        print('%8d %10.2f %14.0f %12.3e %12.3e %10s' % (overlap, stats['time'], stats['max_rss'], diff.max(),
+                                                        diff.mean(), accepted))
+if failed:
+    sys.exit('Tiled inference deviates from full-frame inference by more than %.1e' % args.tolerance)
@@ -1,4 +1,3 @@
-import gc
 import glob
 import os
 from warnings import simplefilter
@@ -7,6 +6,7 @@ from astropy import units as u
 from dateutil.parser import parse
 from tqdm import tqdm
 
+from itipy.data.writer import MapWriter
 from itipy.translate import SOHOToSDO
 
 # init
@@ -32,11 +32,9 @@ dirs = ['171', '195', '284', '304', 'mag']
 [os.makedirs(os.path.join(prediction_path, d), exist_ok=True) for d in dirs]
 
 iti_maps = translator.translate(data_path, basenames=basenames_soho)
-for iti_cube, bn in tqdm(zip(iti_maps, basenames_soho), total=len(basenames_soho)):
-    simplefilter('ignore')  # ignore int conversion warning
-    for s_map, d in zip(iti_cube, dirs):
-        path = os.path.join(os.path.join(prediction_path, d, bn))
-        if os.path.exists(path):
-            os.remove(path)
-        s_map.resample((512, 512) * u.pix).save(path)
-        gc.collect()
+with MapWriter() as writer:
+    for iti_cube, bn in tqdm(zip(iti_maps, basenames_soho), total=len(basenames_soho)):
+        simplefilter('ignore')  # ignore int conversion warning
+        for s_map, d in zip(iti_cube, dirs):
+            path = os.path.join(os.path.join(prediction_path, d, bn))
+            writer.submit(s_map.resample((512, 512) * u.pix), path)
@@ -12,6 +12,9 @@ from imreg_dft import similarity, transform_img_dict
 from sunpy.map import Map
 from tqdm import tqdm
 
+from itipy.data.catalog import ObservationCatalog
+from itipy.data.matching import match_nearest
+
 # Functions
 base_path = '/gpfs/gpfs0/robert.jarolim/iti/hmi_hinode_baseline'
 os.makedirs(base_path, exist_ok=True)
@@ -23,13 +26,15 @@ test_df = df[df.date.dt.month.isin(list(range(2, 10)))]
 test_df = test_df[test_df.classification == 'feature']
 
 hinode_paths = test_df.file
-hinode_dates = [Map(f).date.datetime for f in hinode_paths]
+catalog = ObservationCatalog(os.path.join(base_path, 'catalog.db'))
+hinode_dates = catalog.getDates(hinode_paths)
 
 hmi_paths = np.array(sorted(glob.glob(os.path.join(data_path, '*.fits'))))
 hmi_dates = np.array([parse(os.path.basename(f).split('.')[0]) for f in hmi_paths])
 
-hmi_paths = hmi_paths[[np.argmin(np.abs(hmi_dates - d)) for d in hinode_dates]]
-hmi_dates = np.array([parse(os.path.basename(f).split('.')[0]) for f in hmi_paths])
+hinode_idx, hmi_idx = match_nearest([hinode_dates, hmi_dates])
+hmi_paths, hmi_dates = hmi_paths[hmi_idx], hmi_dates[hmi_idx]
+hinode_paths, hinode_dates = np.array(hinode_paths)[hinode_idx], np.array(hinode_dates)[hinode_idx]
 
 cond = (np.abs(hmi_dates - hinode_dates) < timedelta(seconds=10))
 hmi_paths = hmi_paths[cond]
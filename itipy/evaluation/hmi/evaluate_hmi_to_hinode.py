@@ -17,6 +17,8 @@ from skimage.transform import resize
 from sunpy.map import Map
 from tqdm import tqdm
 
+from itipy.data.catalog import ObservationCatalog
+from itipy.data.matching import match_nearest
 from itipy.data.editor import sdo_norms, hinode_norms
 from itipy.data.sdo.hmi_psf import load_psf
 from itipy.evaluation.compute_fid import calculate_fid_given_paths
@@ -29,6 +31,8 @@ parser.add_argument('--out_path', type=str, help='Path to save evaluation result
 parser.add_argument('--hinode_data', type=str, help='Path to Hinode CSV file.')
 parser.add_argument('--hmi_data', type=str, help='Path to HMI data directory.')
 parser.add_argument('--model_path', type=str, help='Path to model file.')
+parser.add_argument('--catalog_path', type=str, default=None,
+                    help='Path to the observation catalog (default: <out_path>/catalog.db).')
 
 args = parser.parse_args()
 
@@ -96,13 +100,15 @@ use_iti_registration = [
 exclude = invalid_matchings  # + use_iti_registration
 
 hinode_paths = np.array([f for f in test_df.file if os.path.basename(f) not in exclude])
-hinode_dates = [Map(f).date.datetime for f in hinode_paths]
+catalog = ObservationCatalog(args.catalog_path or os.path.join(evaluation_path, 'catalog.db'))
+hinode_dates = catalog.getDates(hinode_paths)
 
 hmi_paths = np.array(sorted(glob.glob(os.path.join(args.hmi_data, '*.fits'))))
 hmi_dates = np.array([parse(os.path.basename(f).split('.')[0]) for f in hmi_paths])
 
-hmi_paths = hmi_paths[[np.argmin(np.abs(hmi_dates - d)) for d in hinode_dates]]
-hmi_dates = np.array([parse(os.path.basename(f).split('.')[0]) for f in hmi_paths])
+hinode_idx, hmi_idx = match_nearest([hinode_dates, hmi_dates])
+hmi_paths, hmi_dates = hmi_paths[hmi_idx], hmi_dates[hmi_idx]
+hinode_paths, hinode_dates = np.array(hinode_paths)[hinode_idx], np.array(hinode_dates)[hinode_idx]
 
 cond = np.abs(hmi_dates - hinode_dates) < timedelta(seconds=10)
 
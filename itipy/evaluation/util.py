@@ -14,6 +14,8 @@ from google.cloud.storage import Client, transfer_manager
 from google.cloud import storage
 
 from itipy.translate import *
+from itipy.data.cube import MapCube
+from itipy.data.writer import MapWriter
 from itipy.data.editor import NormalizeRadiusEditor, AIAPrepEditor, NormalizeExposureEditor, MapToDataEditor, \
     SWAPPrepEditor, LoadMapEditor, solo_norm, proba2_norm
 
@@ -207,16 +209,32 @@ def plotImageComparison(original, ground_truth, iti, original_norm, ground_truth
 
 ################################### Save to FITS ##################################
 
-def saveToFITS(maps, path):
+def saveToFITS(maps, path, **kwargs):
     """
-    Save SunPy maps to FITS files
+    Save SunPy maps to FITS files (asynchronous, see MapWriter)
 
     Args:
         maps: list of SunPy maps
         path: path to save the FITS files
+        **kwargs: additional arguments of the MapWriter (e.g., compression, dtype)
     """
-    for i, m in tqdm(enumerate(maps)):
-        m.save(path+maps[i].meta['date-obs']+'.fits')
+    with MapWriter(**kwargs) as writer:
+        for m in tqdm(maps):
+            writer.submit(m, path + m.meta['date-obs'] + '.fits')
+
+
+def saveToCube(maps, path, channels, **kwargs):
+    """
+    Append SunPy maps to a chunked time series cube (see MapCube); frames that are already in the cube are skipped
+
+    Args:
+        maps: iterable of SunPy map lists (one map per channel)
+        path: path of the HDF5 cube
+        channels: names of the channels
+        **kwargs: additional arguments of the MapCube (e.g., chunks, compression)
+    """
+    with MapCube(path, channels, **kwargs) as cube:
+        cube.extend(tqdm(maps))
 
 
 ################################### Download GCP bucket ###################################
@@ -6,6 +6,7 @@ from sunpy.map import Map
 from sunpy.physics.differential_rotation import solar_rotate_coordinate
 
 from itipy.data.align import alignMaps
+from itipy.data.writer import MapWriter
 from itipy.translate import HMIToHinode
 
 
@@ -36,8 +37,9 @@ filtered_hmi_files = [f for f in hmi_files if not
 os.path.exists(os.path.join(result_path, '%s.fits' % Map(f).date.datetime.isoformat('T')))]
 
 # convert iti
-for iti_map in tqdm(translator.translate(filtered_hmi_files), total=len(filtered_hmi_files)):
-    iti_map.save(os.path.join(result_path, '%s.fits' % iti_map.date.datetime.isoformat('T')))
+with MapWriter() as writer:
+    for iti_map in tqdm(translator.translate(filtered_hmi_files), total=len(filtered_hmi_files)):
+        writer.submit(iti_map, os.path.join(result_path, '%s.fits' % iti_map.date.datetime.isoformat('T')))
 
 # load hinode
 hinode_map = Map(hinode_sample)
@@ -0,0 +1,208 @@
+import logging
+import queue
+import threading
+import time
+
+
+class Stage:
+    """
+    Processing stage of a StagedPipeline.
+
+    Args:
+        name (str): Name of the stage (utilization report).
+        fn (function): Function that is applied to each item (to the list of items for batched stages).
+        n_workers (int): Number of worker threads.
+        batch_size (int): Maximum number of items per call (None to process individual items). Batches are
+            submitted when they are full or when no further items are queued.
+        batch_key (function): Items with different keys are not batched together (e.g., the image shape).
+    """
+
+    def __init__(self, name, fn, n_workers=1, batch_size=None, batch_key=None):
+        self.name = name
+        self.fn = fn
+        self.n_workers = n_workers
+        self.batch_size = batch_size
+        self.batch_key = batch_key
+
+
+class StagedPipeline:
+    """
+    Processing pipeline of stages that are connected by bounded queues.
+
+    The items of the source are produced in a separate thread (e.g., from a process pool) and each stage runs in its
+    own worker threads. Workers block when the queue to the next stage is full (backpressure), such that the number
+    of items in flight is bounded. numpy and torch release the GIL for the heavy operations, such that the stages
+    overlap. Exceptions of the source and the stages are raised by the iterator.
+
+    Args:
+        source (iterable): Input items.
+        stages (list): List of Stage.
+        queue_size (int): Capacity of the queues between the stages.
+        ordered (bool): Yield the results in the order of the source (otherwise as soon as they are available).
+    """
+
+    def __init__(self, source, stages, queue_size=4, ordered=True):
+        self.source = source
+        self.stages = stages
+        self.queue_size = queue_size
+        self.ordered = ordered
+        self._busy = {}
+        self._items = {}
+        self._duration = None
+
+    def __iter__(self):
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._busy = {stage.name: 0. for stage in self.stages}
+        self._busy['source'] = 0.
+        self._items = {name: 0 for name in self._busy}
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        n_readers = [stage.n_workers for stage in self.stages] + [1]
+        threads = [threading.Thread(target=self._produce, args=(queues[0], n_readers[0]), daemon=True)]
+        for i, stage in enumerate(self.stages):
+            remaining = [stage.n_workers]  # workers that did not finish
+            threads += [threading.Thread(target=self._work, args=(stage, queues[i], queues[i + 1], n_readers[i + 1],
+                                                                   remaining), daemon=True)
+                        for _ in range(stage.n_workers)]
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        try:
+            yield from self._consume(queues[-1])
+        finally:
+            self._stop.set()
+            self._duration = time.time() - start
+            for thread in threads:
+                thread.join()
+            self._logStats()
+
+    def stats(self):
+        """
+        Utilization of the stages of the last run.
+
+        Returns:
+            dict: {stage name: {'items', 'busy' (seconds), 'utilization' (busy time per worker and wall time)}}
+        """
+        n_workers = {stage.name: stage.n_workers for stage in self.stages}
+        n_workers['source'] = 1
+        return {name: {'items': self._items[name], 'busy': busy,
+                       'utilization': busy / (self._duration * n_workers[name]) if self._duration else 0.}
+                for name, busy in self._busy.items()}
+
+    def _produce(self, out_queue, n_readers):
+        iterator = iter(self.source)
+        seq = 0
+        try:
+            while not self._stop.is_set():
+                start = time.time()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                except Exception as ex:
+                    self._put(out_queue, (seq, _Failure(ex)))
+                    break
+                self._record('source', time.time() - start, 1)
+                self._put(out_queue, (seq, item))
+                seq += 1
+        finally:
+            if hasattr(iterator, 'close'):
+                iterator.close()
+            for _ in range(n_readers):
+                self._put(out_queue, _END)
+
+    def _work(self, stage, in_queue, out_queue, n_readers, remaining):
+        batch = []
+        while True:
+            entry = self._get(in_queue)
+            if entry is _END:
+                break
+            seq, item = entry
+            if isinstance(item, _Failure):  # forward failures
+                self._put(out_queue, entry)
+                continue
+            if stage.batch_size is None:
+                self._put(out_queue, (seq, self._apply(stage, [item])[0]))
+                continue
+            if len(batch) > 0 and stage.batch_key is not None and \
+                    stage.batch_key(batch[0][1]) != stage.batch_key(item):
+                self._flush(stage, batch, out_queue)
+                batch = []
+            batch.append(entry)
+            if len(batch) >= stage.batch_size or in_queue.empty():
+                self._flush(stage, batch, out_queue)
+                batch = []
+        if len(batch) > 0:
+            self._flush(stage, batch, out_queue)
+        with self._lock:
+            remaining[0] -= 1
+            is_last = remaining[0] == 0
+        if is_last:
+            for _ in range(n_readers):
+                self._put(out_queue, _END)
+
+    def _flush(self, stage, batch, out_queue):
+        results = self._apply(stage, [item for _, item in batch])
+        for (seq, _), result in zip(batch, results):
+            self._put(out_queue, (seq, result))
+
+    def _apply(self, stage, items):
+        start = time.time()
+        try:
+            results = stage.fn(items) if stage.batch_size is not None else [stage.fn(items[0])]
+        except Exception as ex:
+            results = [_Failure(ex)] * len(items)
+        self._record(stage.name, time.time() - start, len(items))
+        return results
+
+    def _consume(self, in_queue):
+        buffer, next_seq = {}, 0
+        while True:
+            entry = self._get(in_queue)
+            if entry is _END:
+                break
+            seq, item = entry
+            if isinstance(item, _Failure):
+                raise item.exception
+            if not self.ordered:
+                yield item
+                continue
+            buffer[seq] = item
+            while next_seq in buffer:
+                yield buffer.pop(next_seq)
+                next_seq += 1
+
+    def _get(self, in_queue):
+        while not self._stop.is_set():
+            try:
+                return in_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _put(self, out_queue, entry):
+        while not self._stop.is_set():
+            try:
+                out_queue.put(entry, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def _record(self, name, duration, n_items):
+        with self._lock:
+            self._busy[name] += duration
+            self._items[name] += n_items
+
+    def _logStats(self):
+        for name, stats in self.stats().items():
+            logging.info('Stage %s: %d items, %.1f s busy, %.0f%% utilization' %
+                         (name, stats['items'], stats['busy'], stats['utilization'] * 100))
+
+
+_END = object()  # end of stream
+
+
+class _Failure:
+
+    def __init__(self, exception):
+        self.exception = exception
@@ -0,0 +1,118 @@
+import copy
+import glob
+import logging
+import os
+
+import numpy as np
+import torch
+from torch import nn
+from torch.ao.quantization import get_default_qconfig_mapping
+from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+from itipy.artifact import save_torchscript
+from itipy.data.storage import ShardedStore
+
+
+def quantize_generator(generator, dataset, n_samples=256, backend='x86', float_modules=(), seed=0):
+    """
+    Post-training static int8 quantization of a generator (CPU inference).
+
+    The generator is traced with torch.fx, such that the skip connections (torch.cat) and the functional operations
+    are quantized together with the modules. Convolutions, ReflectionPad2d, InstanceNorm2d, UpsamplingBilinear2d and
+    the activations run in int8; the activation ranges are calibrated with samples of the dataset. Module types in
+    float_modules are kept in float32 (e.g., nn.InstanceNorm2d if the quantized normalization degrades a model).
+
+    The generator of the caller and the process-wide quantization engine are not modified.
+
+    Args:
+        generator (nn.Module): Float generator (e.g., GeneratorAB).
+        dataset (Dataset): Calibration samples [channel, height, width] (e.g., the StorageDataset of the input
+            instrument).
+        n_samples (int): Number of randomly selected calibration samples.
+        backend (str): Quantization backend ('x86', 'fbgemm' or 'qnnpack').
+        float_modules (tuple): Module types that are not quantized.
+        seed (int): Seed for the selection of the calibration samples.
+
+    Returns:
+        torch.jit.ScriptModule: Quantized generator.
+    """
+    previous_engine = torch.backends.quantized.engine
+    torch.backends.quantized.engine = backend
+    try:
+        generator = copy.deepcopy(generator).cpu().eval()
+        qconfig_mapping = get_default_qconfig_mapping(backend)
+        for module_type in float_modules:
+            qconfig_mapping.set_object_type(module_type, None)
+        indices = np.random.RandomState(seed).permutation(len(dataset))[:n_samples]
+        example = torch.tensor(np.asarray(dataset[indices[0]]), dtype=torch.float32)[None]
+        prepared = prepare_fx(generator, qconfig_mapping, example_inputs=(example,))
+        # calibrate activation ranges
+        with torch.no_grad():
+            for i, idx in enumerate(indices):
+                prepared(torch.tensor(np.asarray(dataset[idx]), dtype=torch.float32)[None])
+                if (i + 1) % 50 == 0:
+                    logging.info('Calibrated %d/%d samples' % (i + 1, len(indices)))
+        quantized = convert_fx(prepared)
+        return torch.jit.script(quantized)
+    finally:
+        torch.backends.quantized.engine = previous_engine
+
+
+def save_quantized_generator(generator, path, backend='x86', depth_generator=3, patch_factor=0):
+    """
+    Save a quantized generator as TorchScript artifact (loaded by InstrumentToInstrument(model_path=...)).
+
+    Args:
+        generator (torch.jit.ScriptModule): Quantized generator.
+        path (str): Path of the artifact.
+        backend (str): Quantization backend of the generator.
+        depth_generator (int): Depth of the generator network (images are padded to multiples of
+            2 ** (depth_generator + patch_factor)).
+        patch_factor (int): Factor by which the image should be divided into patches.
+    """
+    save_torchscript(generator, path, {'format': 'torchscript', 'quantized': 'int8', 'backend': backend,
+                                       'depth_generator': depth_generator, 'patch_factor': patch_factor,
+                                       'padding_divisor': 2 ** (depth_generator + patch_factor)})
+
+
+def load_stored_samples(store_dir):
+    """
+    Samples of the storage directory of a StorageDataset (individual .npy files or sharded store).
+
+    Args:
+        store_dir (str): Storage directory.
+
+    Returns:
+        list: memory-mapped samples [channel, height, width].
+    """
+    if os.path.exists(os.path.join(store_dir, 'index.json')):
+        store = ShardedStore(store_dir)
+        return [store.get(id) for id in sorted(store.index) if ':' not in id]  # without patch indices (<id>:<key>)
+    files = sorted(glob.glob(os.path.join(store_dir, '*.npy')))
+    return [np.load(f, mmap_mode='r') for f in files]
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Post-training int8 quantization of an ITI generator.')
+    parser.add_argument('--model_path', type=str, required=True, help='Path to the float generator.')
+    parser.add_argument('--store_dir', type=str, required=True,
+                        help='Storage directory of the StorageDataset of the input instrument (.npy samples or '
+                             'sharded store).')
+    parser.add_argument('--output_path', type=str, required=True, help='Path of the quantized artifact.')
+    parser.add_argument('--n_samples', type=int, default=256, help='Number of calibration samples.')
+    parser.add_argument('--backend', type=str, default='x86', help='Quantization backend.')
+    parser.add_argument('--float_instance_norm', action='store_true', help='Keep InstanceNorm2d in float32.')
+    parser.add_argument('--depth_generator', type=int, default=3, help='Depth of the generator network.')
+    parser.add_argument('--patch_factor', type=int, default=0, help='Patch factor of the translation.')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    samples = load_stored_samples(args.store_dir)
+    assert len(samples) > 0, 'No samples found in %s' % args.store_dir
+    model = torch.load(args.model_path, map_location='cpu')
+    quantized = quantize_generator(model, samples, n_samples=args.n_samples, backend=args.backend,
+                                   float_modules=(nn.InstanceNorm2d,) if args.float_instance_norm else ())
+    save_quantized_generator(quantized, args.output_path, backend=args.backend, depth_generator=args.depth_generator,
+                             patch_factor=args.patch_factor)
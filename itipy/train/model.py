@@ -1,3 +1,4 @@
+import logging
 from enum import Enum
 
 import torch
@@ -81,6 +82,16 @@ class GeneratorAB(nn.Module):
         x = self.to_image(x)
         return x
 
+    def fuse_for_inference(self):
+        """
+        Fold the InstanceNorm2d layers with running statistics into the preceding convolutions (inference only).
+
+        Returns:
+            nn.Module: The fused generator (modified in place).
+        """
+        return fuse_for_inference(self)
+
+
 class GeneratorBA(nn.Module):
     """
     Generator for the translation Instrument_B to Instrument_A.
@@ -168,6 +179,15 @@ class GeneratorBA(nn.Module):
                                     image.size(3) // 2 ** (self.depth_noise + self.n_downsample)).to(image.device))
         return self.forward(image, noise=n_gen)
 
+    def fuse_for_inference(self):
+        """
+        Fold the InstanceNorm2d layers with running statistics into the preceding convolutions (inference only).
+
+        Returns:
+            nn.Module: The fused generator (modified in place).
+        """
+        return fuse_for_inference(self)
+
 
 class Discriminator(nn.Module):
     """
@@ -490,6 +510,28 @@ class Conv2dBlock(nn.Module):
         else:
             self.conv = conv
 
+    def fuse_norm(self):
+        """
+        Fold an InstanceNorm2d with running statistics into the convolution. In eval mode the normalization is a
+        per-channel affine transform: y = (conv(x) - mean) / sqrt(var + eps) * gamma + beta.
+
+        Returns:
+            bool: True if the normalization was folded.
+        """
+        norm, conv = self.norm, self.conv
+        if not isinstance(norm, nn.InstanceNorm2d) or not norm.track_running_stats or type(conv) != nn.Conv2d:
+            return False
+        assert not self.training, 'Normalization layers can only be folded in eval mode'
+        with torch.no_grad():
+            scale = torch.rsqrt(norm.running_var + norm.eps)
+            shift = -norm.running_mean * scale
+            if norm.affine:
+                scale, shift = scale * norm.weight, shift * norm.weight + norm.bias
+            conv.weight.mul_(scale.reshape(-1, 1, 1, 1))
+            conv.bias.mul_(scale).add_(shift)
+        self.norm = None
+        return True
+
     def init_conv(self, conv):
         init.kaiming_normal(conv.weight)
         if conv.bias is not None:
@@ -579,6 +621,23 @@ class BatchStatistic(nn.Module):
                           torch.mean(x, [0, 2, 3], keepdim=True) * torch.ones_like(x),
                           torch.std(x, [0, 2, 3], keepdim=True) * torch.ones_like(x)], 1)
 
+def fuse_for_inference(module):
+    """
+    Fold the InstanceNorm2d layers with running statistics into the preceding convolutions of all Conv2dBlocks.
+    Blocks with instance statistics (track_running_stats=False) or spectral normalization are not modified.
+
+    Args:
+        module (nn.Module): Model in eval mode.
+
+    Returns:
+        nn.Module: The fused model (modified in place).
+    """
+    module.eval()
+    n_fused = sum(block.fuse_norm() for block in module.modules() if isinstance(block, Conv2dBlock))
+    logging.info('Folded %d normalization layers' % n_fused)
+    return module
+
+
 def l2normalize(v, eps=1e-12):
     """
     L2 normalization.
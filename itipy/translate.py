@@ -1,18 +1,26 @@
+import copy
+import logging
 import os
-from contextlib import closing
-from multiprocessing.pool import Pool
 from pathlib import Path
 from urllib import request
 
 import astropy.units as u
 import numpy as np
 import torch
-from skimage.util import view_as_blocks
-from sunpy.map import Map, make_fitswcs_header, all_coordinates_from_map
+from sunpy.map import Map, make_fitswcs_header
 
+from itipy.artifact import is_artifact, load_artifact
 from itipy.data.dataset import SOHODataset, HMIContinuumDataset, STEREODataset, KSOFlatDataset, KSOFilmDataset, \
     SWAPDataset, EUIDataset, AIADataset
-from itipy.data.editor import PaddingEditor, sdo_norms, hinode_norms, UnpaddingEditor, hri_norm
+from itipy.data.editor import PaddingEditor, sdo_norms, hinode_norms, UnpaddingEditor, hri_norm, get_radial_distance
+from itipy.data.storage import create_pool, parallel_map
+from itipy.data.writer import MapWriter
+from itipy.pipeline import StagedPipeline, Stage
+
+# maximum absolute difference between batched and per-image inference (normalized output range [-1, 1])
+BATCH_TOLERANCE = 1e-5
+# maximum mean absolute difference between tiled and full-frame inference (normalized output range [-1, 1])
+TILE_TOLERANCE = 1e-2
 
 
 class InstrumentToInstrument:
@@ -21,15 +29,39 @@ class InstrumentToInstrument:
 
     Args:
         model_name (str): Name of the model file.
-        model_path (str): Path to the model file.
+        model_path (str): Path to the model file (pickled generator or compiled TorchScript/ONNX artifact, e.g.,
+            exported with itipy/artifact.py or an int8 quantized generator).
         device (torch.device): Device on which the model should be loaded.
         depth_generator (int): Depth of the generator network.
         patch_factor (int): Factor by which the image should be divided into patches.
-        n_workers (int): Number of workers for the multiprocessing pool.
+        n_workers (int): Number of worker processes for loading and preprocessing.
+        n_post_workers (int): Number of worker threads for the map construction and denormalization.
+        queue_size (int): Capacity of the queues between the stages of the translation pipeline.
+        ordered (bool): Return the translated observations in the order of the dataset.
+        batch_size (int): Number of same-shaped images that are translated with a single forward pass. Batched
+            inference is not bit-identical to per-image inference (the convolution algorithms and reduction orders
+            depend on the batch size), but equivalent within BATCH_TOLERANCE (see checkBatchEquivalence). Use
+            batch_size=1 for bit-reproducible results.
+        patch_batch_size (int): Number of patches or tiles that are translated with a single forward pass.
+        tile_size (int): Size of overlapping tiles for the translation of large images (None for full-frame inference).
+        tile_overlap (int): Overlap between neighbouring tiles in pixels.
+        tile_window (str): Blending window for overlapping tiles ('hann' or 'linear').
+        precision (str): Precision of the inference ('float32' or 'bfloat16' autocast). Use
+            ``itipy/evaluation/benchmark/precision_guard.py`` to verify the accuracy of a model in reduced precision.
+        channels_last (bool): Use the channels_last memory format for the generator and the inputs (faster
+            convolutions on the CPU).
+        fuse (bool): Fold the normalization layers with running statistics into the convolutions when the generator
+            is loaded (see GeneratorAB.fuse_for_inference). The fused generator is verified against the original
+            generator on a fixed input; the original generator is used if the check fails. Artifacts that were folded
+            at export time (itipy/artifact.py) are not folded again.
     """
 
-    def __init__(self, model_name=None, model_path=None, device=None, depth_generator=3, patch_factor=0, n_workers=4):
+    def __init__(self, model_name=None, model_path=None, device=None, depth_generator=3, patch_factor=0, n_workers=4,
+                 batch_size=1, patch_batch_size=4, tile_size=None, tile_overlap=128, tile_window='hann',
+                 n_post_workers=2, queue_size=4, ordered=True, precision='float32', channels_last=False,
+                 fuse=True):
         assert model_name is not None or model_path is not None, 'Either model_name or model_path must be provided.'
+        assert precision in ['float32', 'bfloat16'], "Precision must be one of: ['float32', 'bfloat16']"
         self.patch_factor = patch_factor
         self.depth_generator = depth_generator
         # Load Model
@@ -37,59 +69,226 @@ class InstrumentToInstrument:
             device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         if model_path is None:
             model_path = self._getModelPath(model_name)
-        self.generator = torch.load(model_path, map_location=device)
-        self.generator.to(device)
+        self.quantized = False
+        self.artifact_info = None
+        if is_artifact(model_path):  # compiled generators (see itipy/artifact.py and itipy/quantization.py)
+            self.generator, self.artifact_info = load_artifact(model_path, device)
+            self.depth_generator = self.artifact_info.get('depth_generator', depth_generator)
+            self.patch_factor = self.artifact_info.get('patch_factor', patch_factor)
+            if 'quantized' in self.artifact_info:
+                assert precision == 'float32', 'Quantized generators only support float32 inputs'
+                device = torch.device('cpu')  # int8 kernels are only available on the CPU
+                self.quantized = True
+            if self.artifact_info.get('format') == 'onnx':
+                assert precision == 'float32' and not channels_last, \
+                    'ONNX generators only support float32 inputs in the default memory format'
+        else:
+            self.generator = torch.load(model_path, map_location=device)
+            self.generator.to(device)
         self.generator.eval()
+        already_fused = self.artifact_info is not None and self.artifact_info.get('fused', False)
+        if fuse and not already_fused and hasattr(self.generator, 'fuse_for_inference'):
+            self.generator = self._fuseGenerator(self.generator, device)
+        if channels_last:
+            self.generator.to(memory_format=torch.channels_last)
         self.device = device
+        self.precision = precision
+        self.channels_last = channels_last
         self.n_workers = n_workers
+        self.batch_size = batch_size
+        self.patch_batch_size = patch_batch_size
+        assert tile_window in ['hann', 'linear'], "Tile window must be one of: ['hann', 'linear']"
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.tile_window = tile_window
+        self.n_post_workers = n_post_workers
+        self.queue_size = queue_size
+        self.ordered = ordered
+        self.pipeline_stats = None
 
     def forward(self, tensor):
         with torch.no_grad():
-            return self.generator(tensor.to(self.device)).detach().cpu().numpy()
+            return self._runGenerator(tensor).detach().cpu().numpy()
+
+    def _runGenerator(self, tensor):
+        """
+        Apply the generator with the configured precision and memory format.
+
+        Args:
+            tensor (torch.Tensor): input images [batch, channel, height, width].
+
+        Returns:
+            torch.Tensor: translated images (float32).
+        """
+        tensor = tensor.float().to(self.device)
+        if self.channels_last:
+            tensor = tensor.contiguous(memory_format=torch.channels_last)
+        with torch.autocast(device_type=self.device.type, dtype=torch.bfloat16,
+                            enabled=self.precision == 'bfloat16'):
+            iti_tensor = self.generator(tensor)
+        return iti_tensor.float().contiguous()
 
     def translate(self, *args, **kwargs):
+        """
+        Translate observations. The translated maps are yielded and optionally written to output_dir as FITS files by
+        an asynchronous MapWriter (output_dir=..., writer=...; see _translateDataset).
+        """
         raise NotImplementedError()
 
-    def _translateDataset(self, dataset):
-        with closing(Pool(self.n_workers)) as pool:
-            for img, kwargs in pool.imap(dataset.convertData, dataset.data):
-                #
-                original_shape = img.shape
-                img = np.array(img.data)  # remove np mask information
-                #
-                min_dim = min(
-                    [i for i in range(img.shape[1], img.shape[1] * 2 ** (self.depth_generator + self.patch_factor))
-                     if i % 2 ** (self.depth_generator + self.patch_factor) == 0])  # find min dim
-                target_shape = (min_dim, min_dim)
-                padding_editor = PaddingEditor(target_shape)
-                # pad
-                padded_img = padding_editor.call(img)
-                padded_img = np.nan_to_num(padded_img, nan=np.nanmin(padded_img))
-                # translate
-                with torch.no_grad():
-                    if self.patch_factor > 0:
-                        iti_img = self._translateBlocks(padded_img, self.patch_factor)
-                    else:
-                        iti_img = self.generator(torch.tensor(padded_img).float().to(self.device).unsqueeze(0))
-                        iti_img = iti_img[0].detach().cpu().numpy()
-                # unpad
-                scaling = iti_img.shape[-1] / padded_img.shape[-1]
-                iti_img = UnpaddingEditor([p * scaling for p in original_shape[1:]]).call(iti_img)
-                #
-                ref_meta = [k['header'] for k in kwargs['kwargs_list']] if 'kwargs_list' in kwargs else [
-                    kwargs['header']]
-                # use last meta data as reference for additional observables
-                ref_meta += [ref_meta[-1]] * (len(iti_img) - len(ref_meta))
-                #
-                # for synthesis of channel information: 4 --> 5 channels (create proper meta data)
-                ref_img = img.tolist()
-                ref_img += [ref_img[-1]] * (len(iti_img) - len(ref_img))  # extend list
-                ref_img = np.array(ref_img)
-                #
-                # create meta for additional channels
-                maps = [Map(d, self._createMeta(d, ref_d, meta)) for d, ref_d, meta in zip(iti_img, ref_img, ref_meta)]
-                maps = maps[0] if len(maps) == 1 else maps
-                yield maps, img, iti_img
+    def _fuseGenerator(self, generator, device, tolerance=1e-4):
+        # fold normalization layers and verify the fused generator on a fixed (seeded) input
+        reference = copy.deepcopy(generator)
+        fused = generator.fuse_for_inference()
+        n_channels = next(p for p in fused.parameters() if p.dim() == 4).shape[1]
+        size = max(64, 2 ** (self.depth_generator + 2))
+        x = torch.rand(1, n_channels, size, size, generator=torch.Generator().manual_seed(0)) * 2 - 1
+        x = x.to(device)
+        with torch.no_grad():
+            diff = (fused(x) - reference(x)).abs().max().item()
+        if diff > tolerance:
+            logging.warning('Fused generator deviates from the original generator (max diff %.3e); '
+                            'using the original generator' % diff)
+            return reference
+        return fused
+
+    def _translateDataset(self, dataset, postprocess=None, output_dir=None, writer=None):
+        """
+        Translate the dataset with a staged pipeline:
+        load and preprocess (worker processes) -> inference (batches of equally shaped images) ->
+        map construction and postprocess (worker threads) -> FITS writer (optional, see MapWriter).
+
+        Args:
+            dataset (BaseDataset): dataset of the input observations.
+            postprocess (function): function applied to (maps, img, iti_img) in the postprocessing stage
+                (e.g., denormalization).
+            output_dir (str): directory for the translated maps as FITS files (see _writeMaps).
+            writer (MapWriter): asynchronous FITS writer (default: MapWriter with default settings that is closed at
+                the end of the translation; writers that are passed are not closed).
+
+        Returns:
+            generator: (maps, img, iti_img) or the results of postprocess.
+        """
+        assert writer is None or output_dir is not None, 'An output directory is required for the writer'
+        preprocess = _Preprocessor(dataset, 2 ** (self.depth_generator + self.patch_factor))
+        # the workers are forked once before any threads are started (no re-forks during inference)
+        pool = create_pool(preprocess, self.n_workers, max_tasks_per_child=None) if self.n_workers > 0 else None
+        close_writer = output_dir is not None and writer is None
+        writer = MapWriter() if close_writer else writer
+        source = self._loadDataset(dataset, preprocess, pool)
+        stages = [Stage('inference', self._translateBatch, batch_size=self.batch_size,
+                        batch_key=lambda item: item[2].shape),  # only images of the same shape can be stacked
+                  Stage('postprocess', lambda item: self._postprocess(item, postprocess),
+                        n_workers=self.n_post_workers)]
+        if output_dir is not None:
+            stages.append(Stage('writer', lambda result: self._writeMaps(result, writer, output_dir) or result))
+        pipeline = StagedPipeline(source, stages, queue_size=self.queue_size, ordered=self.ordered)
+        try:
+            yield from pipeline
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+            if close_writer:
+                writer.close()
+        self.pipeline_stats = pipeline.stats()
+
+    def _writeMaps(self, result, writer, output_dir):
+        """
+        Submit the translated maps to the writer. Files are named by the observation time of the first map;
+        multi-channel results are written to one subdirectory per channel (<output_dir>/<channel index>/).
+
+        Args:
+            result: result of the postprocessing (map, list of maps or tuple with the maps as first element).
+            writer (MapWriter): asynchronous FITS writer.
+            output_dir (str): output directory.
+        """
+        maps = result[0] if isinstance(result, tuple) else result
+        maps = maps if isinstance(maps, list) else [maps]
+        filename = '%s.fits' % maps[0].date.datetime.strftime('%Y-%m-%dT%H%M%S')
+        for c, s_map in enumerate(maps):
+            directory = output_dir if len(maps) == 1 else os.path.join(output_dir, '%d' % c)
+            os.makedirs(directory, exist_ok=True)
+            writer.submit(s_map, os.path.join(directory, filename))
+
+    def _loadDataset(self, dataset, preprocess, pool=None):
+        for data, result, error in parallel_map(preprocess, dataset.data, self.n_workers,
+                                                max_in_flight=self.queue_size + self.n_workers, pool=pool):
+            if error is not None:
+                raise Exception('Unable to convert %s: %s' % (data, error))
+            yield result
+
+    def _padImage(self, img):
+        return _pad_image(img, 2 ** (self.depth_generator + self.patch_factor))
+
+    def _translateBatch(self, batch):
+        iti_imgs = self._inferBatch(np.stack([padded_img for _, _, padded_img in batch]))
+        return [(img, kwargs, padded_img, iti_img) for (img, kwargs, padded_img), iti_img in zip(batch, iti_imgs)]
+
+    def _postprocess(self, item, postprocess=None):
+        img, kwargs, padded_img, iti_img = item
+        maps, iti_img = self._createMaps(img, kwargs, padded_img, iti_img)
+        if postprocess is None:
+            return maps, img, iti_img
+        return postprocess(maps, img, iti_img)
+
+    def _inferBatch(self, padded_imgs):
+        """
+        Translate a stack of padded images [batch, channel, height, width] with a single forward pass.
+
+        Args:
+            padded_imgs (np.ndarray): stack of padded images.
+
+        Returns:
+            np.ndarray: stack of translated images.
+        """
+        with torch.no_grad():
+            if self.tile_size is not None:
+                return np.stack([self._translateTiles(padded_img) for padded_img in padded_imgs])
+            if self.patch_factor > 0:
+                return np.stack([self._translateBlocks(padded_img, self.patch_factor) for padded_img in padded_imgs])
+            iti_imgs = self._runGenerator(torch.tensor(padded_imgs))
+            return iti_imgs.detach().cpu().numpy()
+
+    def checkBatchEquivalence(self, padded_imgs, tolerance=None):
+        """
+        Compare batched inference with per-image inference.
+
+        Args:
+            padded_imgs (np.ndarray): stack of padded images [batch, channel, height, width].
+            tolerance (float): maximum accepted absolute difference (default: BATCH_TOLERANCE).
+
+        Returns:
+            float: maximum absolute difference between batched and per-image inference.
+        """
+        tolerance = BATCH_TOLERANCE if tolerance is None else tolerance
+        batched = self._inferBatch(padded_imgs)
+        single = np.stack([self._inferBatch(padded_img[None])[0] for padded_img in padded_imgs])
+        max_diff = float(np.abs(batched - single).max())
+        if max_diff > tolerance:
+            logging.warning('Batched inference deviates from per-image inference (max diff %.3e > %.1e)' %
+                            (max_diff, tolerance))
+        return max_diff
+
+    def _createMaps(self, img, kwargs, padded_img, iti_img):
+        original_shape = img.shape
+        # unpad
+        scaling = iti_img.shape[-1] / padded_img.shape[-1]
+        iti_img = UnpaddingEditor([p * scaling for p in original_shape[1:]]).call(iti_img)
+        #
+        ref_meta = [k['header'] for k in kwargs['kwargs_list']] if 'kwargs_list' in kwargs else [
+            kwargs['header']]
+        # use last meta data as reference for additional observables
+        ref_meta += [ref_meta[-1]] * (len(iti_img) - len(ref_meta))
+        #
+        # for synthesis of channel information: 4 --> 5 channels (create proper meta data)
+        ref_img = img.tolist()
+        ref_img += [ref_img[-1]] * (len(iti_img) - len(ref_img))  # extend list
+        ref_img = np.array(ref_img)
+        #
+        # create meta for additional channels
+        maps = [Map(d, self._createMeta(d, ref_d, meta)) for d, ref_d, meta in zip(iti_img, ref_img, ref_meta)]
+        maps = maps[0] if len(maps) == 1 else maps
+        return maps, iti_img
 
     def _createMeta(self, data, ref_data, ref_meta):
         scaling = data.shape[0] / ref_data.shape[0]
@@ -105,24 +304,119 @@ class InstrumentToInstrument:
     def _translateBlocks(self, img, n_patches):
         patch_dim = img.shape[-1] // n_patches
         #
-        patch_shape = (img.shape[0], patch_dim, patch_dim)
-        patches = view_as_blocks(img, patch_shape)
-        patches = np.reshape(patches, (-1, *patch_shape))
-        iti_patches = []
+        blocks = [(i, j) for i in range(n_patches) for j in range(n_patches)]
+        iti_img = None
         with torch.no_grad():
-            for patch in patches:
-                iti_patch = self.generator(torch.tensor(patch).float().to(self.device).unsqueeze(0))
-                iti_patches.append(iti_patch[0].detach().cpu().numpy())
+            for k in range(0, len(blocks), self.patch_batch_size):
+                batch_blocks = blocks[k:k + self.patch_batch_size]
+                # only the patches of the current micro-batch are copied
+                patches = np.stack([img[:, i * patch_dim:(i + 1) * patch_dim, j * patch_dim:(j + 1) * patch_dim]
+                                    for i, j in batch_blocks])
+                iti_patches = self._runGenerator(torch.tensor(patches))
+                iti_patches = iti_patches.detach().cpu().numpy()
+                if iti_img is None:
+                    iti_dim = iti_patches.shape[-1]
+                    iti_img = np.empty((iti_patches.shape[1], n_patches * iti_dim, n_patches * iti_dim),
+                                       dtype=iti_patches.dtype)
+                # write patches directly to the output image
+                for (i, j), iti_patch in zip(batch_blocks, iti_patches):
+                    iti_img[:, i * iti_dim:(i + 1) * iti_dim, j * iti_dim:(j + 1) * iti_dim] = iti_patch
         #
-        iti_patches = np.array(iti_patches)
-        iti_patches = iti_patches.reshape((n_patches, n_patches,
-                                           iti_patches.shape[1], iti_patches.shape[2], iti_patches.shape[3]))
-        iti_img = np.moveaxis(iti_patches, [0, 1], [1, 3]).reshape((iti_patches.shape[2],
-                                                                    iti_patches.shape[0] * iti_patches.shape[3],
-                                                                    iti_patches.shape[1] * iti_patches.shape[4]))
+        return iti_img
+
+    def _translateTiles(self, img):
+        """
+        Translate an image with overlapping tiles that are blended with a weighting window. The memory
+        required for the inference (network activations) is given by the tile size and is independent of the
+        image size; apart from the input and the output image, only the separable blending weights
+        (O(height + width)) are allocated.
+
+        Tiles are aligned to multiples of 2 ** depth_generator, such that the downsampling of the generator
+        is identical to full-frame inference. Deviations from full-frame inference are restricted to the
+        receptive field of the tile borders (reflect padding) and decrease with increasing overlap. The accepted
+        deviation is a mean absolute difference of TILE_TOLERANCE (1e-2 of the normalized range [-1, 1]) for the
+        default overlap of 128 pixels; use ``itipy/evaluation/benchmark/tiled_inference.py`` to verify the
+        tolerance for a specific model and overlap.
+
+        Args:
+            img (np.ndarray): padded image [channel, height, width].
+
+        Returns:
+            np.ndarray: translated image.
+        """
+        tile_size, overlap = self.tile_size, self.tile_overlap
+        alignment = 2 ** self.depth_generator
+        assert tile_size % alignment == 0 and overlap % alignment == 0, \
+            'Tile size and overlap need to be multiples of %d' % alignment
+        assert overlap < tile_size, 'Tile overlap needs to be smaller than the tile size'
+        if img.shape[-2] <= tile_size and img.shape[-1] <= tile_size:
+            with torch.no_grad():
+                iti_img = self._runGenerator(torch.tensor(img).unsqueeze(0))
+                return iti_img[0].detach().cpu().numpy()
         #
+        x_starts, y_starts = self._tileStarts(img.shape[-2]), self._tileStarts(img.shape[-1])
+        tiles = [(x, y) for x in x_starts for y in y_starts]
+        iti_img, scaling = None, None
+        with torch.no_grad():
+            for k in range(0, len(tiles), self.patch_batch_size):
+                batch_tiles = tiles[k:k + self.patch_batch_size]
+                patches = np.stack([img[:, x:x + tile_size, y:y + tile_size] for x, y in batch_tiles])
+                iti_patches = self._runGenerator(torch.tensor(patches))
+                iti_patches = iti_patches.detach().cpu().numpy()
+                if iti_img is None:
+                    scaling = iti_patches.shape[-1] / tile_size
+                    self._checkTileScaling(scaling, img.shape)
+                    iti_img = np.zeros((iti_patches.shape[1], round(img.shape[-2] * scaling),
+                                        round(img.shape[-1] * scaling)), dtype=np.float32)
+                # accumulate weighted tiles
+                for (x, y), iti_patch in zip(batch_tiles, iti_patches):
+                    window = np.outer(self._tileWindow(x, img.shape[-2], scaling),
+                                      self._tileWindow(y, img.shape[-1], scaling))
+                    x, y, size = round(x * scaling), round(y * scaling), round(tile_size * scaling)
+                    iti_img[:, x:x + size, y:y + size] += iti_patch * window
+        # the windows are separable: the summed weights are the outer product of the summed 1D windows
+        x_weights = self._summedWindows(x_starts, img.shape[-2], scaling)
+        y_weights = self._summedWindows(y_starts, img.shape[-1], scaling)
+        iti_img /= x_weights[None, :, None]
+        iti_img /= y_weights[None, None, :]
         return iti_img
 
+    def _checkTileScaling(self, scaling, shape):
+        # tiles need to map to integer pixel positions of the output image
+        assert scaling > 0, 'Invalid output scaling of the generator: %s' % scaling
+        positions = [self.tile_size, self.tile_overlap, *shape[-2:]]
+        positions += self._tileStarts(shape[-2]) + self._tileStarts(shape[-1])
+        assert all(float(p * scaling).is_integer() for p in positions), \
+            'Tile size, overlap and tile positions need to map to integer output pixels (scaling %s)' % scaling
+
+    def _summedWindows(self, starts, size, scaling):
+        weights = np.zeros(round(size * scaling), dtype=np.float32)
+        tile_size = round(self.tile_size * scaling)
+        for start in starts:
+            weights[round(start * scaling):round(start * scaling) + tile_size] += self._tileWindow(start, size, scaling)
+        return weights
+
+    def _tileStarts(self, size):
+        stride = self.tile_size - self.tile_overlap
+        starts = list(range(0, size - self.tile_size + 1, stride))
+        if starts[-1] + self.tile_size < size:
+            starts.append(size - self.tile_size)  # last tile aligned with the image border
+        return starts
+
+    def _tileWindow(self, start, size, scaling):
+        tile_size, overlap = round(self.tile_size * scaling), round(self.tile_overlap * scaling)
+        # complementary ramps: w(t) + w(1 - t) = 1
+        t = (np.arange(overlap) + 0.5) / overlap
+        ramp = np.sin(t * np.pi / 2) ** 2 if self.tile_window == 'hann' else t
+        window = np.ones(tile_size, dtype=np.float32)
+        if overlap == 0:
+            return window
+        if start > 0:  # no blending at the image border
+            window[:overlap] = ramp
+        if start * scaling + tile_size < size * scaling:
+            window[-overlap:] = ramp[::-1]
+        return window
+
     def _getModelPath(self, model_name):
         model_path = os.path.join(Path.home(), '.iti', model_name)
         os.makedirs(os.path.join(Path.home(), '.iti'), exist_ok=True)
@@ -155,6 +449,31 @@ class InstrumentToInstrument:
         return new_meta
 
 
+class _Preprocessor:
+    # load and pad the observations in the worker processes
+
+    def __init__(self, dataset, divisor):
+        self.dataset = dataset
+        self.divisor = divisor
+
+    def __call__(self, data):
+        img, kwargs = self.dataset.convertData(data)
+        img, padded_img = _pad_image(img, self.divisor)
+        return img, kwargs, padded_img
+
+
+def _pad_image(img, divisor):
+    img = np.array(img.data)  # remove np mask information
+    #
+    min_dim = min([i for i in range(img.shape[1], img.shape[1] * divisor) if i % divisor == 0])  # find min dim
+    target_shape = (min_dim, min_dim)
+    padding_editor = PaddingEditor(target_shape)
+    # pad
+    padded_img = padding_editor.call(img)
+    padded_img = np.nan_to_num(padded_img, nan=np.nanmin(padded_img))
+    return img, padded_img
+
+
 class SOHOToSDO(InstrumentToInstrument):
     """
     SOHO to SDO translation of EUV and magnetogram observations.
@@ -167,11 +486,14 @@ class SOHOToSDO(InstrumentToInstrument):
         super().__init__(model_name, **kwargs)
         self.norms = [sdo_norms[171], sdo_norms[193], sdo_norms[211], sdo_norms[304], sdo_norms['mag']]
 
-    def translate(self, path, basenames=None, **kwargs):
+    def translate(self, path, basenames=None, output_dir=None, writer=None, **kwargs):
         soho_dataset = SOHODataset(path, basenames=basenames, **kwargs)
-        for maps, img, iti_img in self._translateDataset(soho_dataset):
-            yield [Map(norm.inverse((s_map.data + 1) / 2), self.toSDOMeta(s_map.meta, instr))
-                   for s_map, norm, instr in zip(maps, self.norms, ['AIA'] * 4 + ['HMI'])]
+        yield from self._translateDataset(soho_dataset, postprocess=self._toSDOMaps, output_dir=output_dir,
+                                          writer=writer)
+
+    def _toSDOMaps(self, maps, img, iti_img):
+        return [Map(norm.inverse((s_map.data + 1) / 2), self.toSDOMeta(s_map.meta, instr))
+                for s_map, norm, instr in zip(maps, self.norms, ['AIA'] * 4 + ['HMI'])]
 
     def toSDOMeta(self, meta, instrument):
         wl_map = {171: 171, 195: 193, 284: 211, 304: 304, 6768: 6173, 0: 0}
@@ -196,11 +518,10 @@ class SOHOToSDOEUV(SOHOToSDO):
         super().__init__(model_name, **kwargs)
         self.norms = [sdo_norms[171], sdo_norms[193], sdo_norms[211], sdo_norms[304]]
 
-    def translate(self, path, basenames=None):
+    def translate(self, path, basenames=None, output_dir=None, writer=None):
         soho_dataset = SOHODataset(path, basenames=basenames, wavelengths=[171, 195, 284, 304])
-        for maps, img, iti_img in self._translateDataset(soho_dataset):
-            yield [Map(norm.inverse((s_map.data + 1) / 2), self.toSDOMeta(s_map.meta, instr))
-                   for s_map, norm, instr in zip(maps, self.norms, ['AIA'] * 4)]
+        yield from self._translateDataset(soho_dataset, postprocess=self._toSDOMaps, output_dir=output_dir,
+                                          writer=writer)
 
 
 class STEREOToSDO(InstrumentToInstrument):
@@ -214,18 +535,22 @@ class STEREOToSDO(InstrumentToInstrument):
     def __init__(self, model_name='stereo_to_sdo_v0_2.pt', **kwargs):
         super().__init__(model_name, **kwargs)
 
-    def translate(self, path, basenames=None, return_arrays=False):
-        stereo_dataset = STEREODataset(path, basenames=basenames)
-        for result, inputs, outputs in self._translateDataset(stereo_dataset):
-            norms = [sdo_norms[171], sdo_norms[193], sdo_norms[211], sdo_norms[304]]
-            result = [Map(norm.inverse((s_map.data + 1) / 2), self.toSDOMeta(s_map.meta, instrument, wl))
-                      for s_map, norm, instrument, wl in
-                      zip(result, norms, ['AIA'] * 4, [171, 193, 211, 304])]
+    def translate(self, path, basenames=None, return_arrays=False, output_dir=None, writer=None, **kwargs):
+        stereo_dataset = STEREODataset(path, basenames=basenames, **kwargs)
+        for result, inputs, outputs in self._translateDataset(stereo_dataset, postprocess=self._toSDOMaps,
+                                                              output_dir=output_dir, writer=writer):
             if return_arrays:
                 yield result, inputs, outputs
             else:
                 yield result
 
+    def _toSDOMaps(self, result, inputs, outputs):
+        norms = [sdo_norms[171], sdo_norms[193], sdo_norms[211], sdo_norms[304]]
+        result = [Map(norm.inverse((s_map.data + 1) / 2), self.toSDOMeta(s_map.meta, instrument, wl))
+                  for s_map, norm, instrument, wl in
+                  zip(result, norms, ['AIA'] * 4, [171, 193, 211, 304])]
+        return result, inputs, outputs
+
     def toSDOMeta(self, meta, instrument, wl):
         new_meta = meta.copy()
         new_meta['obsrvtry'] = 'SOHO-to-SDO'
@@ -247,23 +572,26 @@ class STEREOToSDOMagnetogram(InstrumentToInstrument):
     def __init__(self, model_name='stereo_to_sdo_mag_v0_2.pt', **kwargs):
         super().__init__(model_name, **kwargs)
 
-    def translate(self, path, basenames=None, return_arrays=False):
+    def translate(self, path, basenames=None, return_arrays=False, output_dir=None, writer=None):
         soho_dataset = STEREODataset(path, basenames=basenames)
-        for result, inputs, outputs in self._translateDataset(soho_dataset):
-            norms = [sdo_norms[171], sdo_norms[193], sdo_norms[211], sdo_norms[304]]
-            result = [Map(norm.inverse((s_map.data + 1) / 2), self.toSDOMeta(s_map.meta, 'AIA', wl))
-                      for s_map, norm, wl in zip(result[:-1], norms, [171, 193, 211, 304])] + \
-                     [self._createMagnetogramMap(result[-1].data, result[-1].meta)]
+        for result, inputs, outputs in self._translateDataset(soho_dataset, postprocess=self._toSDOMaps,
+                                                              output_dir=output_dir, writer=writer):
             if return_arrays:
                 yield result, inputs, outputs
             else:
                 yield result
 
+    def _toSDOMaps(self, result, inputs, outputs):
+        norms = [sdo_norms[171], sdo_norms[193], sdo_norms[211], sdo_norms[304]]
+        result = [Map(norm.inverse((s_map.data + 1) / 2), self.toSDOMeta(s_map.meta, 'AIA', wl))
+                  for s_map, norm, wl in zip(result[:-1], norms, [171, 193, 211, 304])] + \
+                 [self._createMagnetogramMap(result[-1].data, result[-1].meta)]
+        return result, inputs, outputs
+
     def _createMagnetogramMap(self, data, meta):
         v_max = sdo_norms['mag'].vmax
         s_map = Map((data + 1) / 2 * v_max, self.toSDOMeta(meta, 'HMI', 6173))
-        hpc_coords = all_coordinates_from_map(s_map)
-        r = np.sqrt(hpc_coords.Tx ** 2 + hpc_coords.Ty ** 2) / s_map.rsun_obs
+        r = get_radial_distance(s_map)
         s_map.data[r > 1] = np.nan
         return s_map
 
@@ -290,9 +618,9 @@ class KSOLowToHigh(InstrumentToInstrument):
         super().__init__(model_name, **kwargs)
         self.resolution = resolution
 
-    def translate(self, paths, return_arrays=True, **kwargs):
+    def translate(self, paths, return_arrays=True, output_dir=None, writer=None, **kwargs):
         ds = KSOFlatDataset(paths, self.resolution, **kwargs)
-        for result, inputs, outputs in self._translateDataset(ds):
+        for result, inputs, outputs in self._translateDataset(ds, output_dir=output_dir, writer=writer):
             if return_arrays:
                 yield result, inputs, outputs
             else:
@@ -312,9 +640,9 @@ class KSOFilmToCCD(InstrumentToInstrument):
         super().__init__(model_name, **kwargs)
         self.resolution = resolution
 
-    def translate(self, paths, return_arrays=False):
+    def translate(self, paths, return_arrays=False, output_dir=None, writer=None):
         ds = KSOFilmDataset(paths, self.resolution)
-        for result, inputs, outputs in self._translateDataset(ds):
+        for result, inputs, outputs in self._translateDataset(ds, output_dir=output_dir, writer=writer):
             if return_arrays:
                 yield result, inputs, outputs
             else:
@@ -332,12 +660,13 @@ class HMIToHinode(InstrumentToInstrument):
     def __init__(self, model_name='hmi_to_hinode_v0_2.pt', **kwargs):
         super().__init__(model_name, **kwargs)
 
-    def translate(self, paths):
+    def translate(self, paths, output_dir=None, writer=None):
         ds = HMIContinuumDataset(paths)
-        for s_map, input, output in self._translateDataset(ds):
-            norm = hinode_norms['continuum']
-            s_map = Map(norm.inverse((s_map.data + 1) / 2), s_map.meta)
-            yield s_map
+        yield from self._translateDataset(ds, postprocess=self._toHinodeMap, output_dir=output_dir, writer=writer)
+
+    def _toHinodeMap(self, s_map, input, output):
+        norm = hinode_norms['continuum']
+        return Map(norm.inverse((s_map.data + 1) / 2), s_map.meta)
 
 
 class SWAPToAIA(InstrumentToInstrument):
@@ -351,12 +680,13 @@ class SWAPToAIA(InstrumentToInstrument):
     def __init__(self, model_name='swap_to_aia_v0_2.pt', **kwargs):
         super().__init__(model_name, **kwargs)
 
-    def translate(self, paths):
+    def translate(self, paths, output_dir=None, writer=None):
         ds = SWAPDataset(paths)
-        for s_map, input, output in self._translateDataset(ds):
-            norm = sdo_norms[171]
-            s_map = Map(norm.inverse((s_map.data + 1) / 2), self.toSDOMeta(s_map.meta, 'AIA'))
-            yield s_map
+        yield from self._translateDataset(ds, postprocess=self._toSDOMap, output_dir=output_dir, writer=writer)
+
+    def _toSDOMap(self, s_map, input, output):
+        norm = sdo_norms[171]
+        return Map(norm.inverse((s_map.data + 1) / 2), self.toSDOMeta(s_map.meta, 'AIA'))
 
     def toSDOMeta(self, meta, instrument):
         wl_map = {174: 171}
@@ -381,11 +711,14 @@ class SolarOrbiterToSDO(InstrumentToInstrument):
         super().__init__(model_name, **kwargs)
         self.norms = [sdo_norms[171], sdo_norms[304]]
 
-    def translate(self, path, basenames=None, **kwargs):
+    def translate(self, path, basenames=None, output_dir=None, writer=None, **kwargs):
         eui_dataset = EUIDataset(path, basenames=basenames, **kwargs)
-        for maps, img, iti_img in self._translateDataset(eui_dataset):
-            yield [Map(norm.inverse((s_map.data + 1) / 2), self.toSDOMeta(s_map.meta, instr))
-                   for s_map, norm, instr in zip(maps, self.norms, ['AIA'] * 2)]
+        yield from self._translateDataset(eui_dataset, postprocess=self._toSDOMaps, output_dir=output_dir,
+                                          writer=writer)
+
+    def _toSDOMaps(self, maps, img, iti_img):
+        return [Map(norm.inverse((s_map.data + 1) / 2), self.toSDOMeta(s_map.meta, instr))
+                for s_map, norm, instr in zip(maps, self.norms, ['AIA'] * 2)]
 
     def toSDOMeta(self, meta, instrument):
         wl_map = {174: 171, 304: 304}
@@ -409,9 +742,10 @@ class SDOToSolarOrbiter(InstrumentToInstrument):
     def __init__(self, model_name='aia_to_hri_v0_1.pt', **kwargs):
         super().__init__(model_name, **kwargs)
 
-    def translate(self, paths):
+    def translate(self, paths, output_dir=None, writer=None):
         ds = AIADataset(paths, wavelength=171)
-        for s_map, input, output in self._translateDataset(ds):
-            norm = hri_norm[174]
-            s_map = Map(norm.inverse((s_map.data + 1) / 2), s_map.meta)
-            yield s_map
+        yield from self._translateDataset(ds, postprocess=self._toHRIMap, output_dir=output_dir, writer=writer)
+
+    def _toHRIMap(self, s_map, input, output):
+        norm = hri_norm[174]
+        return Map(norm.inverse((s_map.data + 1) / 2), s_map.meta)
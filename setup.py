@@ -12,9 +12,9 @@ setup(
     license='GNU GENERAL PUBLIC LICENSE',
     author='Robert Jarolim',
     description='Package for translation between image domains of different astrophysical instruments.',
-    install_requires=['torch>=1.8', 'sunpy>=2.0', 'scikit-image', 'scikit-learn', 'tqdm',
+    install_requires=['torch>=1.13', 'sunpy>=2.0', 'scikit-image', 'scikit-learn', 'tqdm',
                       'numpy', 'matplotlib', 'astropy', 'aiapy', 'drms', 'jupyter', 'sunpy_soar',
-                      'lightning', 'google', 'google-cloud-storage', 'wandb', 'pytorch_fid'],
+                      'lightning', 'google', 'google-cloud-storage', 'wandb', 'pytorch_fid', 'h5py>=3.0'],
     classifiers=[
         'Development Status :: 3 - Alpha',  # either "3 - Alpha", "4 - Beta" or "5 - Production/Stable"
         'License :: OSI Approved :: GPL-3.0 License',
@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture
+def solar_data():
+    """Seeded synthetic intensities with values below and above the normalization limits (0, 8600)."""
+    np = pytest.importorskip('numpy')
+    return np.random.RandomState(0).uniform(-500, 10000, (64, 64))
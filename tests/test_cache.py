@@ -0,0 +1,83 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('pandas')
+
+from itipy.data.cache import EditorCache, UncacheableError, get_fingerprint
+
+
+class _ScaleEditor:
+
+    def __init__(self, factor, offset=None):
+        self.factor = factor
+        self.offset = offset
+
+
+def test_fingerprint_changes_with_parameters():
+    assert get_fingerprint([_ScaleEditor(2)]) == get_fingerprint([_ScaleEditor(2)])
+    assert get_fingerprint([_ScaleEditor(2)]) != get_fingerprint([_ScaleEditor(3)])
+    assert get_fingerprint([_ScaleEditor(2, np.arange(3))]) != get_fingerprint([_ScaleEditor(2, np.arange(4))])
+    assert get_fingerprint([_ScaleEditor(2, {'a': 1})]) != get_fingerprint([_ScaleEditor(2, {'a': 2})])
+
+
+def test_fingerprint_describes_functions():
+    def scale(factor):
+        return lambda x: x * factor
+
+    assert get_fingerprint(scale(2)) == get_fingerprint(scale(2))
+    assert get_fingerprint(scale(2)) != get_fingerprint(scale(3))  # closure
+    assert get_fingerprint(lambda x: x + 1) != get_fingerprint(lambda x: x + 2)  # constants
+    assert get_fingerprint(lambda x, y=1: x + y) != get_fingerprint(lambda x, y=2: x + y)  # defaults
+
+
+def test_fingerprint_refuses_unknown_objects():
+    with pytest.raises(UncacheableError):
+        get_fingerprint([_ScaleEditor(object())])
+
+
+def test_fingerprint_is_stable_across_processes():
+    # sets and dicts are described independently of the hash seed of the process
+    pytest.importorskip('astropy')
+    code = ('from itipy.data.norm import CompiledNormalize; from itipy.data.cache import get_fingerprint; '
+            'from astropy.visualization import AsinhStretch; '
+            'print(get_fingerprint([CompiledNormalize(vmin=0, vmax=8600, stretch=AsinhStretch(0.005)), '
+            '{"wavelengths": {171, 193, 211}, "nan": 0}]))')
+    fingerprints = set()
+    for seed in ['1', '2']:
+        env = dict(os.environ, PYTHONHASHSEED=seed)
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True, env=env,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        fingerprints.add(output.stdout.strip())
+    assert len(fingerprints) == 1
+
+
+def test_cache_round_trip(tmp_path):
+    path = tmp_path / 'observation.fits'
+    path.write_bytes(b'data')
+    cache = EditorCache(str(tmp_path / 'cache'))
+    calls = []
+
+    def convert(data):
+        calls.append(data)
+        return np.arange(10), {'header': 'meta'}
+
+    for editors in [[_ScaleEditor(2)], [_ScaleEditor(2)], [_ScaleEditor(3)]]:
+        data, kwargs = cache.convert(str(path), editors, convert)
+        np.testing.assert_array_equal(data, np.arange(10))
+        assert kwargs == {'header': 'meta'}
+    assert len(calls) == 2  # the second call is loaded from the cache
+
+
+def test_cache_eviction(tmp_path):
+    cache_dir = str(tmp_path / 'cache')
+    cache = EditorCache(cache_dir, max_size=10 * 1024, evict_interval=5)
+    for i in range(20):
+        path = tmp_path / ('observation_%d.fits' % i)
+        path.write_bytes(b'data')
+        cache.convert(str(path), [_ScaleEditor(i)], lambda data: np.zeros(256))  # ~2 kB per entry
+    size = sum(e.stat().st_size for e in os.scandir(cache_dir) if e.name.endswith('.pkl'))
+    assert 0 < size <= 10 * 1024
@@ -0,0 +1,63 @@
+import os
+from datetime import datetime
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('astropy')
+pytest.importorskip('tqdm')
+
+from astropy.io import fits
+
+from itipy.data import catalog as catalog_module
+from itipy.data.catalog import ObservationCatalog
+
+
+def _write_fits(path, date, wavelength=171):
+    header = fits.Header({'DATE-OBS': date, 'WAVELNTH': wavelength, 'INSTRUME': 'AIA', 'QUALITY': 0})
+    fits.PrimaryHDU(np.zeros((4, 4), dtype=np.float32), header).writeto(path)
+
+
+@pytest.fixture
+def archive(tmp_path):
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    for i in range(3):
+        _write_fits(str(data_dir / ('aia_%d.fits' % i)), '2020-01-0%dT00:00:00' % (i + 1))
+    (data_dir / 'broken.fits').write_bytes(b'no fits header')
+    return data_dir
+
+
+def test_update_and_query(archive, tmp_path):
+    catalog = ObservationCatalog(str(tmp_path / 'catalog.db'))
+    assert catalog.update(str(archive), ext='.fits', n_workers=0) == 3
+    assert len(catalog) == 3
+    paths = catalog.query(str(archive), start=datetime(2020, 1, 2))
+    assert [os.path.basename(p) for p in paths] == ['aia_1.fits', 'aia_2.fits']
+    assert catalog.update(str(archive), ext='.fits', n_workers=0) == 0  # unchanged files are not read
+
+
+def test_failed_headers_are_not_read_again(archive, tmp_path, monkeypatch):
+    catalog = ObservationCatalog(str(tmp_path / 'catalog.db'))
+    catalog.update(str(archive), ext='.fits', n_workers=0)
+    read = []
+
+    def read_header_entry(path, date_parser=None):
+        read.append(path)
+        raise OSError('unreadable')
+
+    monkeypatch.setattr(catalog_module, 'read_header_entry', read_header_entry)
+    catalog.update(str(archive), ext='.fits', n_workers=0)
+    catalog.update([str(archive / 'broken.fits')], n_workers=0)
+    assert read == []
+    (archive / 'broken.fits').write_bytes(b'changed content')  # changed files are read again
+    catalog.update(str(archive), ext='.fits', n_workers=0)
+    assert read == [str(archive / 'broken.fits')]
+
+
+def test_get_dates(archive, tmp_path):
+    catalog = ObservationCatalog(str(tmp_path / 'catalog.db'))
+    paths = [str(archive / 'aia_2.fits'), str(archive / 'aia_0.fits')]
+    assert catalog.getDates(paths) == [datetime(2020, 1, 3), datetime(2020, 1, 1)]
+    with pytest.raises(AssertionError):
+        catalog.getDates([str(archive / 'broken.fits')])
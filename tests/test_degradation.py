@@ -0,0 +1,36 @@
+import logging
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+pytest.importorskip('sunpy')
+pytest.importorskip('aiapy')
+pytest.importorskip('skimage')
+
+from itipy.data.editor import AIADegradationTable
+
+
+def _table():
+    dates = pd.to_datetime(['2020-01-03', '2020-01-01', '2020-01-02'])
+    return pd.DataFrame({'DATE': dates, '0171': [3., 1., 2.], '0193': [30., 10., 20.]})
+
+
+def test_nearest_date():
+    table = AIADegradationTable(_table())
+    assert table('2020-01-01T06:00', 171) == 1.
+    assert table('2020-01-01T12:00', 171) == 1.  # earlier date for ties
+    assert table('2020-01-01T18:00', 193) == 20.
+
+
+def test_out_of_range(caplog):
+    table = AIADegradationTable(_table())
+    assert table.covers('2020-01-03T12:00')
+    assert not table.covers('2020-01-05')
+    with caplog.at_level(logging.WARNING):
+        assert table('2020-01-04T00:00', 171) == 3.
+    assert len(caplog.records) == 0
+    with caplog.at_level(logging.WARNING):
+        assert table('2020-02-01', 171) == 3.
+        assert table('2019-12-01', 171) == 1.
+    assert len(caplog.records) == 2
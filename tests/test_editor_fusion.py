@@ -0,0 +1,38 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('sunpy')
+pytest.importorskip('aiapy')
+pytest.importorskip('skimage')
+
+from astropy.visualization import ImageNormalize, AsinhStretch
+
+from itipy.data.editor import NanEditor, NormalizeEditor, ReshapeEditor, FusedArrayEditor, FUSION_TOLERANCE, \
+    fuse_editors
+from itipy.data.norm import CompiledNormalize
+
+
+def _apply(editors, data):
+    kwargs = {}
+    for editor in editors:
+        data, kwargs = editor.convert(data, **kwargs)
+    return data
+
+
+@pytest.mark.parametrize('norm', [ImageNormalize(vmin=0, vmax=8600, stretch=AsinhStretch(0.005), clip=True),
+                                  CompiledNormalize(vmin=0, vmax=8600, stretch=AsinhStretch(0.005), clip=True)])
+def test_fused_within_tolerance(norm, solar_data):
+    editors = [NanEditor(), NormalizeEditor(norm), ReshapeEditor((1, 64, 64))]
+    fused = fuse_editors(editors)
+    assert len(fused) == 1 and isinstance(fused[0], FusedArrayEditor)
+    data = solar_data.copy()
+    data[::7, ::5] = np.nan
+    expected = _apply(editors, data.copy())
+    result = _apply(fused, data.copy())
+    assert result.dtype == np.float32 and result.shape == expected.shape
+    assert np.abs(result - expected).max() <= FUSION_TOLERANCE
+
+
+def test_data_dependent_norm_is_not_fused():
+    editors = [NanEditor(), NormalizeEditor(ImageNormalize(stretch=AsinhStretch(0.005), clip=True))]
+    assert fuse_editors(editors) == editors
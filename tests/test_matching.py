@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from itipy.data.matching import match_nearest
+
+
+def _dates(seconds):
+    return np.datetime64('2020-01-01T00:00:00') + np.array(seconds, dtype='timedelta64[s]')
+
+
+def test_nearest_within_tolerance():
+    reference = _dates([0, 60, 120, 180])
+    other = _dates([2, 65, 200, 121])
+    reference_idx, other_idx = match_nearest([reference, other], tolerance=timedelta(seconds=5))
+    np.testing.assert_array_equal(reference_idx, [0, 1, 2])
+    np.testing.assert_array_equal(other_idx, [0, 1, 3])
+
+
+def test_tolerance_is_inclusive():
+    reference = _dates([0])
+    reference_idx, other_idx = match_nearest([reference, _dates([10])], tolerance=timedelta(seconds=10))
+    assert len(reference_idx) == 1
+    reference_idx, other_idx = match_nearest([reference, _dates([11])], tolerance=timedelta(seconds=10))
+    assert len(reference_idx) == 0
+
+
+def test_many_to_one_reuses_observations():
+    reference_idx, other_idx = match_nearest([_dates([0, 1, 2]), _dates([1])])
+    np.testing.assert_array_equal(reference_idx, [0, 1, 2])
+    np.testing.assert_array_equal(other_idx, [0, 0, 0])
+
+
+def test_one_to_one_is_greedy():
+    # the reference observation 0 loses the conflict for observation 1 and is discarded (see match_nearest)
+    reference_idx, other_idx = match_nearest([_dates([0, 1]), _dates([1, 2])], tolerance=timedelta(seconds=2),
+                                             policy='one-to-one')
+    np.testing.assert_array_equal(reference_idx, [1])
+    np.testing.assert_array_equal(other_idx, [0])
+
+
+def test_matches_argmin_search():
+    rng = np.random.RandomState(0)
+    reference = _dates(np.sort(rng.randint(0, 10000, 200)))
+    other = _dates(rng.randint(0, 10000, 300))
+    reference_idx, other_idx = match_nearest([reference, other], tolerance=timedelta(seconds=20))
+    expected_idx = np.array([np.argmin(np.abs(other - d)) for d in reference])
+    expected = np.abs(other[expected_idx] - reference) <= np.timedelta64(20, 's')
+    np.testing.assert_array_equal(reference_idx, np.flatnonzero(expected))
+    # ties may be resolved differently; the time differences are identical
+    np.testing.assert_array_equal(np.abs(other[other_idx] - reference[reference_idx]),
+                                  np.abs(other[expected_idx] - reference)[expected])
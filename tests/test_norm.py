@@ -0,0 +1,41 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('astropy')
+
+from astropy.visualization import ImageNormalize, AsinhStretch, LinearStretch
+
+from itipy.data.norm import CompiledNormalize
+
+
+@pytest.mark.parametrize('stretch', [AsinhStretch(0.005), LinearStretch()])
+def test_forward_matches_image_normalize(stretch, solar_data):
+    compiled = CompiledNormalize(vmin=0, vmax=8600, stretch=stretch, clip=True)
+    reference = ImageNormalize(vmin=0, vmax=8600, stretch=stretch, clip=True)
+    normalized = compiled(solar_data)
+    assert normalized.dtype == np.float32
+    np.testing.assert_allclose(normalized.data, reference(solar_data).data, rtol=0, atol=1e-6)
+
+
+def test_inverse_matches_image_normalize():
+    values = np.random.RandomState(0).uniform(0, 1, (64, 64))
+    compiled = CompiledNormalize(vmin=0, vmax=8600, stretch=AsinhStretch(0.005), clip=True)
+    reference = ImageNormalize(vmin=0, vmax=8600, stretch=AsinhStretch(0.005), clip=True)
+    inverse = compiled.inverse(values)
+    assert inverse.dtype == np.float64
+    np.testing.assert_allclose(inverse, reference.inverse(values), rtol=1e-12, atol=1e-9)
+    assert CompiledNormalize(vmin=0, vmax=8600, inverse_dtype=np.float32).inverse(values).dtype == np.float32
+
+
+def test_lookup_table_error(solar_data):
+    lut_error = 1e-4
+    compiled = CompiledNormalize(vmin=0, vmax=8600, stretch=AsinhStretch(0.005), clip=True, lut_error=lut_error)
+    reference = ImageNormalize(vmin=0, vmax=8600, stretch=AsinhStretch(0.005), clip=True)
+    diff = np.abs(compiled(solar_data).data - reference(solar_data).data).max()
+    assert diff <= lut_error + 1e-6  # table error and float32 rounding
+
+
+def test_delegates_data_dependent_limits(solar_data):
+    compiled = CompiledNormalize(stretch=LinearStretch(), clip=True)
+    reference = ImageNormalize(stretch=LinearStretch(), clip=True)
+    np.testing.assert_allclose(compiled(solar_data).data, reference(solar_data).data)
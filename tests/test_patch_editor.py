@@ -0,0 +1,38 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('sunpy')
+pytest.importorskip('aiapy')
+pytest.importorskip('skimage')
+
+from itipy.data.editor import BrightestPixelPatchEditor
+
+
+def _disk_with_peaks(peaks):
+    # constant background (e.g., the normalized off-disk region) with Gaussian peaks
+    y, x = np.mgrid[:256, :256]
+    data = np.full((256, 256), -1.)
+    for (py, px), amplitude in peaks:
+        data += amplitude * np.exp(-((y - py) ** 2 + (x - px) ** 2) / (2 * 8 ** 2))
+    return data[None]
+
+
+def test_candidates_are_strict_maxima():
+    data = _disk_with_peaks([((60, 60), 2.), ((180, 120), 1.5)])
+    editor = BrightestPixelPatchEditor((32, 32), top_k=10, random_selection=0)
+    candidates = editor.getCandidates(data)
+    np.testing.assert_array_equal(candidates, [[60, 60], [180, 120]])  # sorted by brightness
+    for _ in range(10):  # patches are never selected in the flat background
+        assert np.std(editor.call(data)) > 0
+
+
+def test_top_k_selects_brightest_peaks():
+    peaks = [((40 + 40 * (i // 4), 40 + 50 * (i % 4)), 1. + 0.1 * i) for i in range(12)]
+    editor = BrightestPixelPatchEditor((32, 32), top_k=3, random_selection=0)
+    candidates = editor.getCandidates(_disk_with_peaks(peaks))
+    np.testing.assert_array_equal(candidates, [peaks[11][0], peaks[10][0], peaks[9][0]])
+
+
+def test_flat_data_uses_global_maximum():
+    editor = BrightestPixelPatchEditor((32, 32), top_k=3)
+    assert len(editor.getCandidates(np.zeros((1, 64, 64)))) > 0
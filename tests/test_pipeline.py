@@ -0,0 +1,88 @@
+import random
+import threading
+import time
+
+import pytest
+
+from itipy.pipeline import Stage, StagedPipeline
+
+
+def _slow_square(x):
+    time.sleep(random.Random(x).uniform(0, 0.01))  # results finish out of order
+    return x * x
+
+
+def _pipeline_threads():
+    return [t for t in threading.enumerate() if t is not threading.current_thread() and t.daemon]
+
+
+def _wait_for_threads(timeout=5):
+    # all stage threads are joined when the iterator finishes
+    end = time.time() + timeout
+    while _pipeline_threads() and time.time() < end:
+        time.sleep(0.01)
+    return len(_pipeline_threads()) == 0
+
+
+def test_ordered_with_multiple_workers():
+    pipeline = StagedPipeline(range(50), [Stage('square', _slow_square, n_workers=4),
+                                          Stage('negate', lambda x: -x, n_workers=3)], queue_size=2)
+    assert list(pipeline) == [-x * x for x in range(50)]
+    assert pipeline.stats()['square']['items'] == 50
+
+
+def test_unordered_with_multiple_workers():
+    pipeline = StagedPipeline(range(50), [Stage('square', _slow_square, n_workers=4)], ordered=False)
+    assert sorted(pipeline) == [x * x for x in range(50)]
+
+
+def test_batches_respect_size_and_key():
+    batches = []
+
+    def record(batch):
+        batches.append(list(batch))
+        return batch
+
+    items = [1, 3, 5, 2, 4, 7, 9, 11, 13]
+    pipeline = StagedPipeline(items, [Stage('batch', record, batch_size=2, batch_key=lambda x: x % 2)])
+    assert list(pipeline) == items
+    assert all(len(batch) <= 2 and len({x % 2 for x in batch}) == 1 for batch in batches)
+
+
+def test_source_error_is_raised():
+    def source():
+        yield from range(3)
+        raise ValueError('source failed')
+
+    pipeline = StagedPipeline(source(), [Stage('square', _slow_square, n_workers=2)])
+    with pytest.raises(ValueError, match='source failed'):
+        list(pipeline)
+    assert _wait_for_threads()
+
+
+def test_stage_error_is_raised():
+    def fail(x):
+        if x == 5:
+            raise RuntimeError('stage failed')
+        return x
+
+    pipeline = StagedPipeline(range(20), [Stage('fail', fail, n_workers=2), Stage('square', _slow_square)])
+    with pytest.raises(RuntimeError, match='stage failed'):
+        list(pipeline)
+    assert _wait_for_threads()
+
+
+def test_early_exit_stops_threads():
+    closed = threading.Event()
+
+    def source():
+        try:
+            yield from range(10000)
+        finally:
+            closed.set()
+
+    iterator = iter(StagedPipeline(source(), [Stage('square', _slow_square, n_workers=4)], queue_size=2))
+    assert [next(iterator) for _ in range(3)] == [0, 1, 4]
+    iterator.close()  # consumer stops early
+    assert closed.is_set()
+    assert _wait_for_threads()
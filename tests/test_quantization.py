@@ -0,0 +1,38 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+torch = pytest.importorskip('torch')
+pytest.importorskip('sunpy')
+
+from itipy.quantization import quantize_generator, save_quantized_generator
+from itipy.train.model import GeneratorAB
+from itipy.translate import InstrumentToInstrument
+
+
+def _backend():
+    engines = torch.backends.quantized.supported_engines
+    backend = next((b for b in ['x86', 'fbgemm', 'qnnpack'] if b in engines), None)
+    if backend is None:
+        pytest.skip('No quantization backend available')
+    return backend
+
+
+def test_quantized_artifact(tmp_path):
+    backend = _backend()
+    torch.manual_seed(0)
+    generator = GeneratorAB(1, 1, depth=2, n_upsample=0, dim=8, pad_type='reflect').eval()
+    samples = list(np.random.RandomState(0).uniform(-1, 1, (8, 1, 32, 32)).astype(np.float32))
+    state = {k: v.clone() for k, v in generator.state_dict().items()}
+    previous_engine = torch.backends.quantized.engine
+    quantized = quantize_generator(generator, samples, n_samples=8, backend=backend)
+    assert torch.backends.quantized.engine == previous_engine
+    assert all(torch.equal(v, state[k]) for k, v in generator.state_dict().items())  # the generator is not modified
+
+    path = str(tmp_path / 'quantized.pt')
+    save_quantized_generator(quantized, path, backend=backend, depth_generator=2)
+    translator = InstrumentToInstrument(model_path=path, depth_generator=5)
+    assert translator.quantized and translator.depth_generator == 2
+    images = np.stack(samples[:2])
+    with torch.no_grad():
+        expected = generator(torch.tensor(images)).numpy()
+    assert np.abs(translator._inferBatch(images) - expected).mean() < 0.1
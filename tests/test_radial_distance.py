@@ -0,0 +1,52 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('sunpy')
+pytest.importorskip('aiapy')
+pytest.importorskip('skimage')
+
+from sunpy.map import Map, all_coordinates_from_map
+
+from itipy.data.editor import get_radial_distance, _ArrayCache
+
+
+def _rotated_map(crval=(50., -30.), angle=15.):
+    # off-center pointing, rotated PC matrix and unequal pixel scales
+    c, s = np.cos(np.deg2rad(angle)), np.sin(np.deg2rad(angle))
+    header = {'naxis': 2, 'naxis1': 288, 'naxis2': 256, 'ctype1': 'HPLN-TAN', 'ctype2': 'HPLT-TAN',
+              'cunit1': 'arcsec', 'cunit2': 'arcsec', 'cdelt1': 8.0, 'cdelt2': 7.5, 'crpix1': 150.5, 'crpix2': 120.25,
+              'crval1': crval[0], 'crval2': crval[1], 'pc1_1': c, 'pc1_2': -s, 'pc2_1': s, 'pc2_2': c,
+              'date-obs': '2020-01-01T00:00:00', 'rsun_obs': 960., 'dsun_obs': 1.496e11, 'hgln_obs': 0.,
+              'hglt_obs': 0.}
+    return Map(np.zeros((256, 288), dtype=np.float32), header)
+
+
+def _exact_radial_distance(s_map):
+    coords = all_coordinates_from_map(s_map)
+    return (np.sqrt(coords.Tx ** 2 + coords.Ty ** 2) / s_map.rsun_obs).value
+
+
+def test_radial_distance_matches_wcs():
+    s_map = _rotated_map()
+    radial_distance = get_radial_distance(s_map)
+    exact = _exact_radial_distance(s_map)
+    assert radial_distance.shape == exact.shape
+    on_disk = exact <= 1
+    assert on_disk.sum() > 0 and (~on_disk).sum() > 0
+    assert np.abs(radial_distance - exact)[on_disk].max() < 1e-5
+    assert np.abs(radial_distance - exact)[exact <= 1.7].max() < 4e-5
+
+
+def test_radial_distance_is_shared():
+    assert get_radial_distance(_rotated_map()) is get_radial_distance(_rotated_map())
+    assert not get_radial_distance(_rotated_map()).flags.writeable
+
+
+def test_array_cache_shares_budget():
+    cache = _ArrayCache(max_bytes=3 * 800)
+    first = cache.memoize(lambda n: np.zeros(n))
+    second = cache.memoize(lambda n: np.ones(n))
+    a, b = first(100), second(100)  # 800 bytes each
+    assert first(100) is a and second(100) is b
+    second(200)  # 1600 bytes: the least recently used array is evicted
+    assert second(100) is b and first(100) is not a
@@ -0,0 +1,108 @@
+import json
+import os
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('tqdm')
+
+from itipy.data.storage import ShardedStore, atomic_write, parallel_map
+
+
+class _Dataset:
+    # minimal dataset interface of ShardedStore.build (data, getId, __getitem__)
+
+    def __init__(self, samples, invalid=()):
+        self.data = ['sample_%d.fits' % i for i in range(len(samples))]
+        self.samples = samples
+        self.invalid = set(invalid)
+
+    def __len__(self):
+        return len(self.samples)
+
+    def getId(self, idx):
+        return 'sample_%d' % idx
+
+    def __getitem__(self, idx):
+        if idx in self.invalid:
+            raise ValueError('invalid sample')
+        return self.samples[idx]
+
+
+def _samples(n=5):
+    rng = np.random.RandomState(0)
+    return [rng.uniform(-1, 1, (2, 16 + i, 24)).astype(np.float32) for i in range(n)]
+
+
+def test_round_trip(tmp_path):
+    samples = _samples()
+    store = ShardedStore(str(tmp_path), shard_size=4096)  # multiple shards
+    for i, sample in enumerate(samples):
+        store.put('sample_%d' % i, sample)
+    store.flush()
+    store = ShardedStore(str(tmp_path), shard_size=4096)
+    assert len(store) == len(samples)
+    assert len({entry[0] for entry in store.index.values()}) > 1
+    for i, sample in enumerate(samples):
+        loaded = store.get('sample_%d' % i)
+        assert loaded.dtype == np.float32
+        np.testing.assert_array_equal(loaded, sample)
+
+
+def test_build_records_failures(tmp_path):
+    samples = _samples()
+    dataset = _Dataset(samples, invalid=[2])
+    store = ShardedStore(str(tmp_path))
+    invalid = store.build(dataset, n_workers=0)
+    assert invalid == ['sample_2.fits']
+    assert len(store) == len(samples) - 1
+    with open(os.path.join(str(tmp_path), 'failures.json')) as f:
+        assert 'ValueError' in json.load(f)['sample_2']['reason']
+    for i in [0, 1, 3, 4]:
+        np.testing.assert_array_equal(store.get('sample_%d' % i), samples[i])
+    # failed samples are only converted again with retry_failed
+    dataset.invalid = set()
+    assert store.build(dataset, n_workers=0) == ['sample_2.fits']
+    assert store.build(dataset, n_workers=0, retry_failed=True) == []
+    np.testing.assert_array_equal(ShardedStore(str(tmp_path)).get('sample_2'), samples[2])
+
+
+def test_build_additional_entries(tmp_path):
+    samples = _samples(2)
+    dataset = _Dataset(samples)
+    store = ShardedStore(str(tmp_path))
+    store.build(dataset, n_workers=0, convert_fn=_convertWithMax)
+    np.testing.assert_array_equal(store.get('sample_1'), samples[1])
+    np.testing.assert_array_equal(store.get('sample_1:max'), samples[1].max(axis=0))
+
+
+def _convertWithMax(idx):
+    sample = _samples(2)[idx]
+    return sample, {'max': sample.max(axis=0)}
+
+
+def test_parallel_map_order_and_errors():
+    results = list(parallel_map(_invert, [1, 2, 0, 4], n_workers=2, max_in_flight=2))
+    assert [item for item, _, _ in results] == [1, 2, 0, 4]
+    assert [result for _, result, _ in results] == [1.0, 0.5, None, 0.25]
+    assert results[2][2].startswith('ZeroDivisionError')
+
+
+def _invert(x):
+    return 1 / x
+
+
+def test_atomic_write(tmp_path):
+    path = str(tmp_path / 'file.txt')
+    with atomic_write(path) as tmp:
+        with open(tmp, 'w') as f:
+            f.write('a')
+        assert not os.path.exists(path)
+    with pytest.raises(RuntimeError):
+        with atomic_write(path) as tmp:
+            with open(tmp, 'w') as f:
+                f.write('b')
+            raise RuntimeError()
+    with open(path) as f:
+        assert f.read() == 'a'  # the file is not modified by failed writes
+    assert os.listdir(str(tmp_path)) == ['file.txt']
@@ -0,0 +1,53 @@
+import copy
+
+import pytest
+
+np = pytest.importorskip('numpy')
+torch = pytest.importorskip('torch')
+pytest.importorskip('sunpy')
+
+from itipy.artifact import export_generator
+from itipy.train.model import GeneratorAB
+from itipy.translate import InstrumentToInstrument, BATCH_TOLERANCE
+
+
+def _generator(norm):
+    torch.manual_seed(0)
+    generator = GeneratorAB(1, 1, depth=2, n_upsample=0, dim=8, norm=norm, pad_type='reflect')
+    for module in generator.modules():  # non-trivial running statistics
+        if isinstance(module, torch.nn.InstanceNorm2d) and module.track_running_stats:
+            module.running_mean.uniform_(-0.5, 0.5)
+            module.running_var.uniform_(0.5, 2)
+    return generator.eval()
+
+
+def _images(n=3, size=32):
+    return np.random.RandomState(0).uniform(-1, 1, (n, 1, size, size)).astype(np.float32)
+
+
+def test_norm_folding_within_tolerance():
+    generator = _generator('in_rs_aff')
+    reference = copy.deepcopy(generator)
+    fused = generator.fuse_for_inference()
+    assert not any(isinstance(m, torch.nn.InstanceNorm2d) for m in fused.modules())
+    x = torch.tensor(_images())
+    with torch.no_grad():
+        assert (fused(x) - reference(x)).abs().max().item() <= 1e-4
+
+
+def test_translator_norm_folding_falls_back():
+    generator = _generator('in_rs_aff')
+    translator = InstrumentToInstrument.__new__(InstrumentToInstrument)
+    translator.depth_generator = 2
+    # a negative tolerance rejects the fused generator (fallback to the original generator)
+    result = translator._fuseGenerator(copy.deepcopy(generator), torch.device('cpu'), tolerance=-1)
+    assert any(isinstance(m, torch.nn.InstanceNorm2d) for m in result.modules())
+    result = translator._fuseGenerator(copy.deepcopy(generator), torch.device('cpu'))
+    assert not any(isinstance(m, torch.nn.InstanceNorm2d) for m in result.modules())
+
+
+def test_batched_inference_within_tolerance(tmp_path):
+    path = str(tmp_path / 'generator.pt')
+    export_generator(_generator('in_rs'), path, depth_generator=2, resolution=32)
+    translator = InstrumentToInstrument(model_path=path, device=torch.device('cpu'), batch_size=3)
+    assert translator.checkBatchEquivalence(_images()) <= BATCH_TOLERANCE